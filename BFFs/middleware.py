@@ -1,47 +1,102 @@
-from tokenize import TokenError
-from channels.auth import AuthMiddlewareStack
+"""websocket JWT 인증
+
+query string 의 access token 을 한 번만 검증하고(서명 검증은 CPU 작업이라 event loop 에서
+바로 처리), 유저 조회 결과는 (user_id, jti) 기준으로 짧게 프로세스 메모리에 캐시한다.
+DB 조회는 database_sync_to_async 로 event loop 밖에서 한다.
+토큰이 없거나 잘못된 연결은 DB 를 거치지 않고 바로 거절한다.
+"""
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
-from django.db import close_old_connections
-from jwt import InvalidTokenError
-from rest_framework_simplejwt.tokens import UntypedToken
-
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from jwt import decode as jwt_decode
-from django.contrib.auth.models import AnonymousUser
-from urllib.parse import parse_qs
 from rest_framework_simplejwt.exceptions import TokenError
-from user.models import User
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
 
+USER_CACHE_TTL = 60
+USER_CACHE_SIZE = 10000
+# 인증 실패시 close code
+WS_UNAUTHORIZED = 4001
 
-@database_sync_to_async
-def get_user(validated_token):
-    try:
-        user = get_user_model().objects.get(id=validated_token["user_id"])
 
+class UserCache:
+    """(user_id, jti) -> user, TTL 과 최대 개수가 있는 LRU"""
+
+    def __init__(self, ttl=USER_CACHE_TTL, size=USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self.items = OrderedDict()
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is None:
+            return None
+        expires_at, user = item
+        if expires_at < time.monotonic():
+            del self.items[key]
+            return None
+        self.items.move_to_end(key)
         return user
 
-    except User.DoesNotExist:
-        return AnonymousUser()
+    def set(self, key, user):
+        self.items[key] = (time.monotonic() + self.ttl, user)
+        self.items.move_to_end(key)
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
 
+    def clear(self):
+        self.items.clear()
 
-class JwtAuthMiddleware(BaseMiddleware):
-    def __init__(self, inner):
-        self.inner = inner
 
+user_cache = UserCache()
+
+
+@database_sync_to_async
+def get_user(user_id):
+    """로그인 가능한 유저, 없거나 탈퇴/비활성이면 None"""
+    return (
+        get_user_model()
+        .objects.filter(id=user_id, is_active=True, is_withdraw=False)
+        .first()
+    )
+
+
+def get_token(scope):
+    tokens = parse_qs(scope.get("query_string", b"").decode("utf8")).get("token")
+    return tokens[0] if tokens else None
+
+
+class JwtAuthMiddleware(BaseMiddleware):
     async def __call__(self, scope, receive, send):
-        close_old_connections()
-        token = parse_qs(scope["query_string"].decode("utf8"))["token"][0]
+        token = get_token(scope)
+        if not token:
+            return await self.reject(receive, send)
         try:
-            UntypedToken(token)
-        except (InvalidTokenError, TokenError) as e:
-            return None
-        else:
-            decoded_data = jwt_decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            scope["user"] = await get_user(validated_token=decoded_data)
+            payload = AccessToken(token).payload
+        except TokenError:
+            return await self.reject(receive, send)
+
+        user_id = payload.get(api_settings.USER_ID_CLAIM)
+        key = (user_id, payload.get(api_settings.JTI_CLAIM))
+        user = user_cache.get(key)
+        if user is None:
+            user = await get_user(user_id)
+            if user is None:
+                return await self.reject(receive, send)
+            user_cache.set(key, user)
+        scope["user"] = user
         return await super().__call__(scope, receive, send)
 
+    async def reject(self, receive, send):
+        """handshake 를 받고 바로 close, consumer 까지 가지 않는다"""
+        message = await receive()
+        if message["type"] == "websocket.connect":
+            await send({"type": "websocket.close", "code": WS_UNAUTHORIZED})
+
 
 def JwtAuthMiddlewareStack(inner):
-    return JwtAuthMiddleware(AuthMiddlewareStack(inner))
+    # session 인증은 쓰지 않으므로 AuthMiddlewareStack(session 조회)은 거치지 않는다
+    return JwtAuthMiddleware(inner)
@@ -0,0 +1,175 @@
+"""keyset 커서 페이지네이션, 기본은 (created_at, id) 최신순
+
+OFFSET 없이 마지막으로 본 row 다음부터 가져오기 때문에 뒤쪽 페이지도 첫 페이지와 같은 비용.
+전체 개수는 캐시된 근사값으로 total_pages 만 제공한다.
+ordering 의 마지막 필드는 유일한 값(id)이어야 하고, NULL 이 있는 필드는 nullable 에 넣는다
+(NULL 을 가장 큰 값으로 보고 정렬한다).
+"""
+import base64
+import hashlib
+import json
+import math
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 4
+    max_page_size = 50
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    # 근사 전체 개수 캐시 시간(초), None 이면 total_pages 를 계산하지 않음
+    count_cache_timeout = 60
+    ordering = ("-created_at", "-id")
+    nullable = ()
+    invalid_cursor_message = "잘못된 cursor 입니다"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset = queryset
+        self.page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(request)
+
+        ordering = [
+            (field.lstrip("-"), field.startswith("-") != reverse)
+            for field in self.ordering
+        ]
+        queryset = queryset.order_by(
+            *[
+                F(name).desc(nulls_first=True) if desc else F(name).asc(nulls_last=True)
+                for name, desc in ordering
+            ]
+        )
+        try:
+            if position:
+                queryset = queryset.filter(self.get_position_filter(ordering, position))
+            results = list(queryset[: self.page_size + 1])
+        except ValidationError:
+            # 타입은 맞지만 필드 값으로 바꿀 수 없는 cursor (날짜 자리에 아무 문자열 등)
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_position_filter(self, ordering, position):
+        """(a, b, c) > (x, y, z) 를 a > x OR (a = x AND b > y) OR ... 로 풀어쓴 조건"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, desc), value in zip(ordering, position):
+            if value is None:
+                # NULL 은 가장 큰 값, 내림차순이면 NULL 이 아닌 값 모두가 뒤
+                beyond = Q(**{f"{name}__isnull": False}) if desc else Q(pk__in=[])
+                condition |= equal & beyond
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+            lookup = f"{name}__lt" if desc else f"{name}__gt"
+            beyond = Q(**{lookup: value})
+            if name in self.nullable and not desc:
+                beyond |= Q(**{f"{name}__isnull": True})
+            condition |= equal & beyond
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, instance, reverse=False):
+        data = [int(reverse)]
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip("-"))
+            data.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    def decode_cursor(self, request):
+        """(reverse, position), 만들 수 없는 cursor 는 NotFound"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            reverse, *values = json.loads(base64.urlsafe_b64decode(encoded))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            reverse not in (0, 1)
+            or len(values) != len(self.ordering)
+            or not all(
+                isinstance(value, (str, int, float))
+                or (value is None and field.lstrip("-") in self.nullable)
+                for field, value in zip(self.ordering, values)
+            )
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        position = []
+        for value in values:
+            if isinstance(value, str):
+                try:
+                    value = parse_datetime(value) or value
+                except ValueError:
+                    pass
+            position.append(value)
+        return bool(reverse), tuple(position)
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_cursor(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], True)
+
+    def get_cursor_link(self, cursor):
+        """현재 요청 URL 의 cursor 만 바꾼 링크, cursor 가 None 이면 None"""
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_first_link(self):
+        return remove_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param
+        )
+
+    def get_next_link(self):
+        return self.get_cursor_link(self.get_next_cursor())
+
+    def get_previous_link(self):
+        return self.get_cursor_link(self.get_previous_cursor())
+
+    def get_total_pages(self):
+        if self.count_cache_timeout is None:
+            return None
+        query = str(self.queryset.order_by().query)
+        key = "pagination:count:" + hashlib.md5(query.encode()).hexdigest()
+        count = cache.get_or_set(key, self.queryset.count, self.count_cache_timeout)
+        return math.ceil(count / self.page_size)
+
+    def get_page_info(self):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "first": self.get_first_link(),
+            "total_pages": self.get_total_pages(),
+        }
+
+    def get_paginated_response(self, data):
+        return Response({**self.get_page_info(), "results": data})
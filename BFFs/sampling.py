@@ -0,0 +1,96 @@
+"""랜덤 목록 샘플링
+
+order_by("?") 로 매 요청 전체 테이블을 RANDOM() 정렬하지 않고, id 목록을 한 번 섞어서
+캐시에 두고(ROTATE_SECONDS 마다 새로 섞음) seed 로 정한 위치부터 잘라서 보여준다.
+같은 seed 로 다음 페이지를 요청하면 캐시가 살아있는 동안 같은 순서가 유지된다.
+"""
+import random
+from uuid import uuid4
+
+from django.core.cache import cache
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+ROTATE_SECONDS = 60 * 10
+CURRENT_KEY = "sampling:{}:current"
+IDS_KEY = "sampling:{}:{}"
+
+
+def get_shuffled_ids(queryset, epoch=None):
+    """(epoch, 섞인 id 목록), epoch 의 목록이 만료됐으면 현재 목록"""
+    label = queryset.model._meta.label_lower
+    if epoch:
+        ids = cache.get(IDS_KEY.format(label, epoch))
+        if ids is not None:
+            return epoch, ids
+    epoch = cache.get(CURRENT_KEY.format(label))
+    ids = cache.get(IDS_KEY.format(label, epoch)) if epoch else None
+    if ids is None:
+        epoch = uuid4().hex[:8]
+        ids = list(queryset.order_by().values_list("id", flat=True))
+        random.shuffle(ids)
+        # 이전 목록으로 보던 seed 가 끝까지 볼 수 있도록 목록은 더 오래 보관
+        cache.set(IDS_KEY.format(label, epoch), ids, ROTATE_SECONDS * 3)
+        cache.set(CURRENT_KEY.format(label), epoch, ROTATE_SECONDS)
+    return epoch, ids
+
+
+class RandomSamplePagination(BasePagination):
+    """
+    `?seed=` 로 같은 랜덤 순서를 이어서 보는 페이지네이션, seed 가 없으면 새로 발급
+    """
+
+    page_size = 12
+    max_page_size = 50
+    page_size_query_param = "page_size"
+    seed_query_param = "seed"
+    page_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        epoch, offset = self.decode_seed(request)
+        epoch, ids = get_shuffled_ids(queryset, epoch)
+        if offset is None:
+            offset = random.randrange(len(ids)) if ids else 0
+        self.seed = f"{epoch}.{offset}"
+        try:
+            self.page = max(1, int(request.query_params[self.page_query_param]))
+        except (KeyError, ValueError):
+            self.page = 1
+
+        # seed 위치부터 한 바퀴 돌 때까지만 보여준다
+        start = (self.page - 1) * page_size
+        end = min(start + page_size, len(ids))
+        self.has_next = end < len(ids)
+        page_ids = [ids[(offset + i) % len(ids)] for i in range(start, end)]
+        objects = queryset.in_bulk(page_ids)
+        return [objects[pk] for pk in page_ids if pk in objects]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_seed(self, request):
+        seed = request.query_params.get(self.seed_query_param, "")
+        epoch, _, offset = seed.partition(".")
+        try:
+            return epoch, int(offset)
+        except ValueError:
+            return None, None
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.seed_query_param, self.seed)
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"seed": self.seed, "next": self.get_next_link(), "results": data}
+        )
@@ -0,0 +1,197 @@
+"""전문 검색 인덱스
+
+PostgreSQL 에서는 GIN 표현식 인덱스 + ts_rank, SQLite 에서는 signal 로 동기화하는
+FTS5 가상 테이블 + bm25 로 검색하고, (점수, id) 기준 커서로 페이지를 나눈다.
+HTML 본문은 태그를 제거한 뒤 인덱싱한다.
+"""
+import base64
+import html
+import json
+
+from django.db import connection
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.utils.html import strip_tags
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def strip_html(value):
+    return html.unescape(strip_tags(value or ""))
+
+
+class FullTextIndex:
+    def __init__(self, model, fields, html_fields=()):
+        self.model = model
+        self.fields = fields
+        self.html_fields = html_fields
+        self.table = f"{model._meta.db_table}_search"
+        post_save.connect(self.on_save, sender=model, weak=False)
+        post_delete.connect(self.on_delete, sender=model, weak=False)
+        post_migrate.connect(self.on_migrate, weak=False, dispatch_uid=self.table)
+
+    # 인덱스 생성 / 동기화
+
+    def document(self, instance):
+        return " ".join(
+            strip_html(getattr(instance, field))
+            if field in self.html_fields
+            else str(getattr(instance, field) or "")
+            for field in self.fields
+        )
+
+    def pg_vector(self):
+        columns = []
+        for field in self.fields:
+            column = connection.ops.quote_name(self.model._meta.get_field(field).column)
+            column = f"coalesce({column}, '')"
+            if field in self.html_fields:
+                column = f"regexp_replace({column}, '<[^>]+>', ' ', 'g')"
+            columns.append(column)
+        document = " || ' ' || ".join(columns)
+        return f"to_tsvector('simple', {document})"
+
+    def on_migrate(self, sender, **kwargs):
+        if sender.label == self.model._meta.app_label:
+            self.install()
+
+    def install(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_gin "
+                    f"ON {self.model._meta.db_table} USING gin ({self.pg_vector()})"
+                )
+            elif connection.vendor == "sqlite":
+                if self.table in connection.introspection.table_names(cursor):
+                    return
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {self.table} "
+                    f"USING fts5(document, tokenize='unicode61')"
+                )
+                self.rebuild()
+
+    def rebuild(self):
+        """SQLite 검색 테이블을 원본 테이블 기준으로 다시 채우기"""
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            for instance in self.model.objects.only("pk", *self.fields).iterator():
+                cursor.execute(
+                    f"INSERT INTO {self.table}(rowid, document) VALUES (%s, %s)",
+                    [instance.pk, self.document(instance)],
+                )
+
+    def on_save(self, sender, instance, **kwargs):
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table}(rowid, document) VALUES (%s, %s)",
+                [instance.pk, self.document(instance)],
+            )
+
+    def on_delete(self, sender, instance, **kwargs):
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+
+    # 검색
+
+    def search(self, term, after=None, limit=10):
+        """점수 높은 순 (id, score) 목록, after 는 이전 페이지 마지막 (score, id)"""
+        if not term.split():
+            return []
+        sql, params = self.search_sql(term, after, limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def search_sql(self, term, after=None, limit=10):
+        """검색 SQL 과 params, 실행 계획 확인용으로 따로 둔다"""
+        words = term.split()
+        if connection.vendor == "postgresql":
+            query = " & ".join(
+                "'" + word.replace("\\", "").replace("'", "''") + "':*"
+                for word in words
+            )
+            vector = self.pg_vector()
+            sql = (
+                f"SELECT id, score FROM (SELECT id, ts_rank({vector}, query)::float8 "
+                f"AS score FROM {self.model._meta.db_table}, "
+                f"to_tsquery('simple', %s) query WHERE {vector} @@ query) ranked"
+            )
+        else:
+            query = " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+            sql = (
+                f"SELECT id, score FROM (SELECT rowid AS id, -bm25({self.table}) "
+                f"AS score FROM {self.table} WHERE {self.table} MATCH %s) ranked"
+            )
+        params = [query]
+        if after:
+            sql += " WHERE (score, id) < (%s, %s)"
+            params += list(after)
+        sql += " ORDER BY score DESC, id DESC LIMIT %s"
+        params.append(limit)
+        return sql, params
+
+
+class FullTextSearchPagination(BasePagination):
+    """
+    `?search=` 가 있으면 view.search_index 점수순, 없으면 최신순으로 커서 페이지네이션
+    """
+
+    page_size = 10
+    max_page_size = 50
+    page_size_query_param = "page_size"
+    search_param = "search"
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_page_size(request)
+        after = self.decode_cursor(request)
+        term = request.query_params.get(self.search_param, "").strip()
+        if term:
+            ranked = view.search_index.search(term, after, limit + 1)
+        else:
+            if after:
+                queryset = queryset.filter(id__lt=after[1])
+            ids = queryset.order_by("-id").values_list("id", flat=True)[: limit + 1]
+            ranked = [(pk, 0) for pk in ids]
+        self.has_next = len(ranked) > limit
+        ranked = ranked[:limit]
+        self.last = ranked[-1] if ranked else None
+        objects = queryset.in_bulk([pk for pk, score in ranked])
+        return [objects[pk] for pk, score in ranked if pk in objects]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            score, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return float(score), int(pk)
+        except (TypeError, ValueError):
+            return None
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        pk, score = self.last
+        cursor = base64.urlsafe_b64encode(json.dumps([score, pk]).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
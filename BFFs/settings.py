@@ -15,6 +15,7 @@ from decouple import config
 from datetime import timedelta
 import pytz
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +56,21 @@ INSTALLED_APPS = [
     "meetai",
 ]
 
+TESTING = sys.argv[1:2] == ["test"]
+
+# 조회수/로그인 기록 버퍼, 권한/금칙어 캐시, 발송 한도는 웹/celery 프로세스가 같이 봐야 해서
+# 기본은 docker-compose 의 redis, 테스트이거나 REDIS_URL= 로 비워두면 프로세스 메모리로 대체
+REDIS_URL = config("REDIS_URL", default="" if TESTING else "redis://redis:6379/1")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache"
+        if REDIS_URL
+        else "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": REDIS_URL,
+    }
+}
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -84,6 +100,9 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6,
+    # 앞단 프록시 수(로드밸런서 + nginx), X-Forwarded-For 의 뒤에서 이 번째 주소를 클라이언트 IP 로
+    # 그보다 앞의 값은 클라이언트가 보낸 것이라 믿지 않는다 (user.loginlog.get_ip_address)
+    "NUM_PROXIES": config("NUM_PROXIES", default=2, cast=int),
 }
 
 ROOT_URLCONF = "BFFs.urls"
@@ -210,8 +229,12 @@ SIMPLE_JWT = {
 
 CRON_CLASSES = [
     "user.cron.MyCronJob",
+    "user.cron.LoginLogFlushJob",
+    "user.cron.LoginLogMaintenanceJob",
     "feed.cron.ImageDeleteJob",
     "feed.cron.MyPurchaseCronJob",
+    "feed.cron.ViewCountFlushJob",
+    "alarm.cron.AlarmRetentionJob",
 ]
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -221,6 +244,9 @@ EMAIL_HOST_USER = config("EMAIL")
 EMAIL_HOST_PASSWORD = config("EMAIL_PASSWORD")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# 메일 발송 한도 (Gmail SMTP 하루 2000통), 워커 전체에서 공유
+EMAIL_RATE_PER_MINUTE = config("EMAIL_RATE_PER_MINUTE", default=300, cast=int)
+EMAIL_RATE_PER_DAY = config("EMAIL_RATE_PER_DAY", default=2000, cast=int)
 
 BROKER_URL = "amqp://rabbitmq:5672//"
 
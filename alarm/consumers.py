@@ -3,13 +3,20 @@ from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 from .models import Alarm
-from .serializers import AlarmSerializer
+from .serializers import alarm_payloads
+
+
+# 접속시 보내는 읽지 않은 알람 수, 나머지는 AlarmView 에서 페이지로 조회
+UNREAD_PUSH_LIMIT = 20
 
 
 def get_alarm(user):
-    notifications = Alarm.objects.filter(user=user)
-    serializer = AlarmSerializer(notifications, many=True)
-    return serializer.data
+    """최신 읽지 않은 알람 UNREAD_PUSH_LIMIT 개, 오래된 것부터"""
+    alarms = alarm_payloads(
+        Alarm.objects.filter(user=user, is_read=False).order_by("-created_at", "-id"),
+        UNREAD_PUSH_LIMIT,
+    )
+    return alarms[::-1]
 
 
 class AlarmConsumer(AsyncWebsocketConsumer):
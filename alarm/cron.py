@@ -0,0 +1,12 @@
+from django_cron import CronJobBase, Schedule
+
+from .tasks import prune_alarms_job
+
+
+class AlarmRetentionJob(CronJobBase):
+    RUN_TIME = ["04:00"]
+    schedule = Schedule(run_at_times=RUN_TIME)
+    code = "alarm.alarm_retention_job"
+
+    def do(self):
+        prune_alarms_job.delay()
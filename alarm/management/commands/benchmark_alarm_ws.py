@@ -0,0 +1,153 @@
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from alarm.models import Alarm
+from alarm.routing import websocket_urlpatterns
+from alarm.tasks import deliver_alarms
+from BFFs.middleware import JwtAuthMiddlewareStack, user_cache
+from user.models import User
+
+EMAIL_DOMAIN = "@ws-benchmark.invalid"
+IN_MEMORY_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def summary(values):
+    """초 단위 측정값 -> ms 단위 요약"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+        "max_ms": round(max(values) * 1000, 3) if values else None,
+        "mean_ms": round(statistics.mean(values) * 1000, 3) if values else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "AlarmConsumer websocket 부하 측정, in-memory channel layer 로 접속 지연, "
+        "알람 fan-out p50/p99, 연결당 메모리를 JSON 으로 저장"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--rounds", type=int, default=3, help="알람 전송 횟수")
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--output", default="benchmark_alarm_ws.json")
+
+    def handle(self, *args, **options):
+        users = self.create_users(options["connections"])
+        try:
+            with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYERS):
+                result = asyncio.run(self.run(users, options))
+        finally:
+            User.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+
+        with open(options["output"], "w") as f:
+            json.dump(result, f, indent=2)
+        self.stdout.write(json.dumps(result, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"결과 저장: {options['output']}"))
+
+    def create_users(self, count):
+        User.objects.filter(email__endswith=EMAIL_DOMAIN).delete()
+        User.objects.bulk_create(
+            [
+                User(email=f"bench{i}{EMAIL_DOMAIN}", name=f"bench{i}")
+                for i in range(count)
+            ]
+        )
+        return list(User.objects.filter(email__endswith=EMAIL_DOMAIN))
+
+    async def run(self, users, options):
+        user_cache.clear()
+        application = JwtAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        connected = await asyncio.gather(
+            *[self.connect(application, token, options["timeout"]) for token in tokens]
+        )
+        connect_seconds = time.perf_counter() - started
+        memory_after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        communicators = [c for c, _ in connected if c is not None]
+        connect_latency = [latency for c, latency in connected if c is not None]
+        fanout_latency = []
+        missed = 0
+        try:
+            for _ in range(options["rounds"]):
+                latency, round_missed = await self.fanout(
+                    users, communicators, options["timeout"]
+                )
+                fanout_latency += latency
+                missed += round_missed
+        finally:
+            await asyncio.gather(*[c.disconnect() for c in communicators])
+
+        return {
+            "connections": len(users),
+            "connected": len(communicators),
+            "connect_total_s": round(connect_seconds, 3),
+            "connect_latency": summary(connect_latency),
+            "fanout_latency": summary(fanout_latency),
+            "fanout_missed": missed,
+            "memory_per_connection_bytes": (
+                (memory_after - memory_before) // len(communicators)
+                if communicators
+                else None
+            ),
+        }
+
+    async def connect(self, application, token, timeout):
+        communicator = WebsocketCommunicator(application, f"/alarm/?token={token}")
+        started = time.perf_counter()
+        try:
+            accepted, _ = await communicator.connect(timeout)
+        except asyncio.TimeoutError:
+            accepted = False
+        latency = time.perf_counter() - started
+        return (communicator if accepted else None), latency
+
+    async def fanout(self, users, communicators, timeout):
+        """유저마다 알람 하나씩 생성/전송 후 각 websocket 이 받을 때까지 시간"""
+        await database_sync_to_async(Alarm.objects.bulk_create)(
+            [Alarm(user=user, message="benchmark") for user in users]
+        )
+        started = time.perf_counter()
+
+        async def receive(communicator):
+            try:
+                await communicator.receive_from(timeout)
+            except asyncio.TimeoutError:
+                return None
+            return time.perf_counter() - started
+
+        receivers = [
+            asyncio.ensure_future(receive(communicator))
+            for communicator in communicators
+        ]
+        for user in users:
+            await database_sync_to_async(deliver_alarms)(user.id)
+        results = await asyncio.gather(*receivers)
+        latency = [result for result in results if result is not None]
+        return latency, len(results) - len(latency)
@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 from django.db import models
 
 from user.models import User
@@ -9,3 +11,14 @@ class Alarm(models.Model):
     feed = models.ForeignKey(Feed, on_delete=models.CASCADE, null=True)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(default=False)
+    # 클라이언트 중복 제거용, 접속시 재전송과 실시간 전송에서 같은 값
+    delivery_id = models.UUIDField(default=uuid4, editable=False)
+    is_delivered = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"]),
+            # 보관 기간 지난 알람 정리용
+            models.Index(fields=["created_at"]),
+        ]
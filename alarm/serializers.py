@@ -1,12 +1,44 @@
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
-from datetime import datetime
-from pytz import timezone
+from django.db.models import F
+from django.utils import timezone
 from django.utils.timesince import timesince
 
 from .models import Alarm
-from community.models import Community
-from feed.models import Category
+
+ALARM_FIELDS = (
+    "id",
+    "delivery_id",
+    "user",
+    "feed",
+    "message",
+    "created_at",
+    "is_read",
+)
+
+
+def format_created_at(created_at, now=None):
+    return timesince(created_at, now or timezone.now()) + " 전"
+
+
+def alarm_payloads(queryset, limit=None):
+    """
+    알람 목록을 feed→category→community join 쿼리 1번으로 바로 보낼 수 있는 dict 로
+    feed 가 없는 알람은 community_name 이 None
+    """
+    now = timezone.now()
+    rows = queryset.annotate(
+        community_name=F("feed__category__community__communityurl")
+    ).values(*ALARM_FIELDS, "community_name")
+    if limit is not None:
+        rows = rows[:limit]
+    return [
+        {
+            **row,
+            "delivery_id": str(row["delivery_id"]),
+            "created_at": format_created_at(row["created_at"], now),
+        }
+        for row in rows
+    ]
 
 
 class AlarmSerializer(serializers.ModelSerializer):
@@ -15,15 +47,12 @@ class AlarmSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Alarm
-        fields = "__all__"
+        exclude = ["is_delivered"]
 
     def get_created_at(self, obj):
-        now = datetime.now(timezone("Asia/Seoul"))
-        return timesince(obj.created_at, now) + " 전"
+        return format_created_at(obj.created_at)
 
     def get_community_name(self, obj):
-        category = get_object_or_404(Category, id=obj.feed.category_id)
-        communityurl = get_object_or_404(
-            Community, title=category.community
-        ).communityurl
-        return communityurl
+        if obj.feed is None:
+            return None
+        return obj.feed.category.community.communityurl
@@ -1,17 +1,13 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from .models import Alarm
-from .serializers import AlarmSerializer
+from .tasks import schedule_delivery
 
 
 @receiver(post_save, sender=Alarm)
 def send_alarm(sender, instance, created, **kwargs):
+    """commit 이후 전송 예약만 하고, 실제 전송은 celery worker 에서"""
     if created:
-        channel_layer = get_channel_layer()
-        user = instance.user
-        async_to_sync(channel_layer.group_send)(
-            f"user{user.id}",
-            {"type": "send_alarm", "message": AlarmSerializer(instance).data},
-        )
+        user_id = instance.user_id
+        transaction.on_commit(lambda: schedule_delivery(user_id))
@@ -0,0 +1,96 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Alarm
+from .serializers import alarm_payloads
+
+logger = logging.getLogger(__name__)
+
+# 이 시간 안에 같은 유저에게 생긴 알람은 websocket 메시지 하나로 묶어서 전송
+COALESCE_SECONDS = 2
+# 메시지 하나에 담는 최대 알람 수, 더 많으면 여러 메시지로 나눠 전송
+DELIVERY_LIMIT = 20
+SCHEDULED_KEY = "alarm:scheduled:{}"
+
+# 읽은 알람 / 읽지 않은 알람 보관 기간(일)
+READ_RETENTION_DAYS = 30
+UNREAD_RETENTION_DAYS = 90
+DELETE_BATCH_SIZE = 1000
+
+
+def prune_alarms():
+    """
+    보관 기간이 지난 알람을 DELETE_BATCH_SIZE 개씩 삭제, 삭제한 수 반환
+    OR 조건 대신 created_at 인덱스를 타는 조건 두 개로 나눠서 지운다
+    """
+    now = timezone.now()
+    deleted = 0
+    for expired in (
+        Alarm.objects.filter(
+            created_at__lt=now - timezone.timedelta(days=UNREAD_RETENTION_DAYS)
+        ),
+        Alarm.objects.filter(
+            created_at__lt=now - timezone.timedelta(days=READ_RETENTION_DAYS),
+            is_read=True,
+        ),
+    ):
+        while True:
+            ids = list(expired.values_list("id", flat=True)[:DELETE_BATCH_SIZE])
+            if not ids:
+                break
+            deleted += Alarm.objects.filter(id__in=ids).delete()[0]
+    return deleted
+
+
+@shared_task
+def prune_alarms_job():
+    prune_alarms()
+
+
+def schedule_delivery(user_id):
+    """
+    알람 전송 예약, 이미 예약된 전송이 있으면 그 전송에 같이 포함된다
+    broker 장애시에도 요청은 실패하지 않고, 알람은 다음 접속 때 전달된다
+    """
+    key = SCHEDULED_KEY.format(user_id)
+    # worker 가 죽어서 키가 안 지워져도 일정 시간 뒤에는 다시 예약 가능
+    if not cache.add(key, 1, COALESCE_SECONDS * 30):
+        return
+    try:
+        deliver_alarms_job.apply_async(
+            (user_id,), countdown=COALESCE_SECONDS, retry=False
+        )
+    except Exception:
+        cache.delete(key)
+        logger.exception("alarm delivery scheduling failed: user %s", user_id)
+
+
+def deliver_alarms(user_id):
+    """
+    아직 전송하지 않은 알람을 오래된 순서로 DELIVERY_LIMIT 개씩 websocket 메시지로 전송
+    보낸 알람만 전송 완료로 표시, 전송한 수 반환
+    """
+    # 키를 먼저 지워서 조회 이후에 생긴 알람은 새로 예약되게 한다
+    cache.delete(SCHEDULED_KEY.format(user_id))
+    pending = Alarm.objects.filter(user_id=user_id, is_delivered=False).order_by("id")
+    group_send = async_to_sync(get_channel_layer().group_send)
+    sent = 0
+    while True:
+        payloads = alarm_payloads(pending, DELIVERY_LIMIT)
+        if not payloads:
+            return sent
+        group_send(f"user{user_id}", {"type": "send_alarm", "message": payloads})
+        Alarm.objects.filter(id__in=[payload["id"] for payload in payloads]).update(
+            is_delivered=True
+        )
+        sent += len(payloads)
+
+
+@shared_task
+def deliver_alarms_job(user_id):
+    deliver_alarms(user_id)
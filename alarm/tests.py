@@ -1,3 +1,226 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from BFFs.middleware import JwtAuthMiddlewareStack, WS_UNAUTHORIZED, user_cache
+from user.models import User
+from community.models import Community
+from feed.models import Category, Feed
+from .consumers import UNREAD_PUSH_LIMIT, get_alarm
+from .models import Alarm
+from .routing import websocket_urlpatterns
+from .serializers import alarm_payloads
+from .tasks import (
+    DELIVERY_LIMIT,
+    deliver_alarms,
+    deliver_alarms_job,
+    prune_alarms,
+)
+
+
+class AlarmPayloadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test1@naver.com", "test1", "test123!")
+        community = Community.objects.create(
+            title="title1", communityurl="title1", introduction="introduction1"
+        )
+        category = Category.objects.create(
+            community=community, category_name="얘기해요", category_url="talk"
+        )
+        feed = Feed.objects.create(user=cls.user, category=category, title="title")
+        # post_save 알람 전송(redis)을 거치지 않도록 bulk_create
+        Alarm.objects.bulk_create(
+            [Alarm(user=cls.user, feed=feed, message="댓글") for _ in range(3)]
+            + [Alarm(user=cls.user, feed=None, message="삭제된 게시글")]
+        )
+
+    def test_alarm_payloads_one_query(self):
+        """알람 수와 무관하게 쿼리 1번, feed 없는 알람도 처리"""
+        with CaptureQueriesContext(connection) as queries:
+            payloads = alarm_payloads(
+                Alarm.objects.filter(user=self.user).order_by("id")
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(payloads), 4)
+        names = [payload["community_name"] for payload in payloads]
+        self.assertEqual(names, ["title1", "title1", "title1", None])
+        self.assertTrue(payloads[0]["created_at"].endswith(" 전"))
+
+
+class AlarmViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test1@naver.com", "test1", "test123!")
+        Alarm.objects.bulk_create(
+            [Alarm(user=cls.user, message=f"알람{i}") for i in range(25)]
+        )
+        cls.path = reverse("alarm_view")
+
+    def test_get_unread_alarm_on_connect(self):
+        """접속시 최신 읽지 않은 알람만 UNREAD_PUSH_LIMIT 개"""
+        Alarm.objects.filter(message="알람24").update(is_read=True)
+        alarms = get_alarm(self.user)
+        self.assertEqual(len(alarms), UNREAD_PUSH_LIMIT)
+        self.assertEqual(alarms[-1]["message"], "알람23")
+
+    def test_get_alarm_pages(self):
+        """알람 목록 커서 페이지네이션"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.path)
+        self.assertEqual(len(response.data["results"]), 20)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_patch_alarm_read(self):
+        """알람 읽음 처리"""
+        self.client.force_authenticate(user=self.user)
+        alarm = Alarm.objects.first()
+        self.client.patch(reverse("alarm_view", kwargs={"alarm_id": alarm.id}))
+        self.assertTrue(Alarm.objects.get(id=alarm.id).is_read)
+        response = self.client.get(self.path, {"unread": "true", "page_size": 50})
+        self.assertEqual(len(response.data["results"]), 24)
+        self.client.patch(self.path)
+        self.assertFalse(Alarm.objects.filter(is_read=False).exists())
+
+    def test_prune_alarms(self):
+        """보관 기간이 지난 알람 삭제"""
+        now = timezone.now()
+        Alarm.objects.filter(message="알람0").update(
+            is_read=True, created_at=now - timezone.timedelta(days=31)
+        )
+        Alarm.objects.filter(message="알람1").update(
+            created_at=now - timezone.timedelta(days=31)
+        )
+        Alarm.objects.filter(message="알람2").update(
+            created_at=now - timezone.timedelta(days=91)
+        )
+        self.assertEqual(prune_alarms(), 2)
+        self.assertTrue(Alarm.objects.filter(message="알람1").exists())
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+)
+class AlarmDeliveryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test1@naver.com", "test1", "test123!")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_alarm_delivery_coalesced(self):
+        """짧은 시간에 생긴 알람은 전송 예약 1번, 메시지 1개로 전송"""
+        with mock.patch.object(deliver_alarms_job, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    Alarm.objects.create(user=self.user, message=f"알람{i}")
+        self.assertEqual(apply_async.call_count, 1)
+
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user{self.user.id}", channel)
+        self.assertEqual(deliver_alarms(self.user.id), 3)
+        event = async_to_sync(channel_layer.receive)(channel)
+        messages = [alarm["message"] for alarm in event["message"]]
+        self.assertEqual(messages, ["알람0", "알람1", "알람2"])
+        self.assertEqual(len({alarm["delivery_id"] for alarm in event["message"]}), 3)
+        self.assertEqual(deliver_alarms(self.user.id), 0)
+
+    def test_alarm_delivery_over_limit(self):
+        """DELIVERY_LIMIT 개가 넘으면 오래된 순서로 나눠서 모두 전송"""
+        Alarm.objects.bulk_create(
+            Alarm(user=self.user, message=f"알람{i}") for i in range(DELIVERY_LIMIT + 1)
+        )
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user{self.user.id}", channel)
+        self.assertEqual(deliver_alarms(self.user.id), DELIVERY_LIMIT + 1)
+        events = [async_to_sync(channel_layer.receive)(channel) for _ in range(2)]
+        self.assertEqual(
+            [alarm["message"] for event in events for alarm in event["message"]],
+            [f"알람{i}" for i in range(DELIVERY_LIMIT + 1)],
+        )
+        self.assertFalse(Alarm.objects.filter(is_delivered=False).exists())
+
+    def test_alarm_delivery_broker_down(self):
+        """broker 장애시에도 알람 생성은 성공"""
+        with mock.patch.object(
+            deliver_alarms_job, "apply_async", side_effect=ConnectionError
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                Alarm.objects.create(user=self.user, message="알람")
+        self.assertTrue(Alarm.objects.filter(is_delivered=False).exists())
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+)
+class AlarmWebsocketAuthTest(TransactionTestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user("test1@naver.com", "test1", "test123!")
+        self.application = JwtAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    async def connect(self, path):
+        communicator = WebsocketCommunicator(self.application, path)
+        connected, code = await communicator.connect()
+        await communicator.disconnect()
+        return connected, code
+
+    async def test_websocket_no_token(self):
+        """토큰 없으면 바로 거절"""
+        connected, code = await self.connect("/alarm/")
+        self.assertFalse(connected)
+        self.assertEqual(code, WS_UNAUTHORIZED)
+
+    async def test_websocket_invalid_token(self):
+        """잘못된 토큰 거절"""
+        connected, code = await self.connect("/alarm/?token=invalid")
+        self.assertFalse(connected)
+        self.assertEqual(code, WS_UNAUTHORIZED)
+
+    async def test_websocket_token_user_cache(self):
+        """같은 토큰으로 다시 접속하면 유저 조회 없이 캐시 사용"""
+        token = str(AccessToken.for_user(self.user))
+        connected, _ = await self.connect(f"/alarm/?token={token}")
+        self.assertTrue(connected)
+        with mock.patch("BFFs.middleware.get_user") as get_user:
+            connected, _ = await self.connect(f"/alarm/?token={token}")
+        self.assertTrue(connected)
+        get_user.assert_not_called()
+
+
+class AlarmWebsocketBenchmarkTest(TransactionTestCase):
+    def test_benchmark_alarm_ws(self):
+        """부하 측정 command 가 결과 JSON 을 만들고 측정용 유저를 정리"""
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_alarm_ws",
+                connections=5,
+                rounds=2,
+                output=output.name,
+                stdout=io.StringIO(),
+            )
+            result = json.load(open(output.name))
+        self.assertEqual(result["connected"], 5)
+        self.assertEqual(result["fanout_latency"]["count"], 10)
+        self.assertEqual(result["fanout_missed"], 0)
+        self.assertFalse(User.objects.exists())
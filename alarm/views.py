@@ -1,17 +1,46 @@
 from rest_framework import status
+from rest_framework.generics import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from BFFs.pagination import KeysetPagination
 from .models import Alarm
+from .serializers import AlarmSerializer
+
+
+class AlarmPagination(KeysetPagination):
+    page_size = 20
+    count_cache_timeout = None
 
 
 class AlarmView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = AlarmPagination
+
+    def get(self, request):
+        """알람 목록 최신순 커서 페이지네이션, `?unread=true` 면 읽지 않은 알람만"""
+        alarms = Alarm.objects.filter(user=request.user).select_related(
+            "feed__category__community"
+        )
+        if request.query_params.get("unread") == "true":
+            alarms = alarms.filter(is_read=False)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(alarms, request)
+        serializer = AlarmSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def patch(self, request, alarm_id=None):
+        """알람 읽음 처리, alarm_id 가 없으면 전체"""
+        alarm = Alarm.objects.filter(user=request.user, is_read=False)
+        if alarm_id is not None:
+            alarm = alarm.filter(id=alarm_id)
+        alarm.update(is_read=True)
+        return Response({"message": "알람을 읽음 처리했습니다"}, status=status.HTTP_200_OK)
 
     def delete(self, request, alarm_id=None):
         if alarm_id is not None:
-            alarm = Alarm.objects.get(id=alarm_id)
+            alarm = get_object_or_404(Alarm, id=alarm_id, user=request.user)
         else:
             alarm = Alarm.objects.filter(user=request.user)
         alarm.delete()
@@ -3,6 +3,7 @@ from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.core.files.storage import default_storage
 from django.core.validators import MinLengthValidator
+from BFFs.search import FullTextIndex
 from user.models import User
 
 
@@ -64,3 +65,8 @@ class ForbiddenWord(models.Model):
 
     def __str__(self):
         return str(self.word)
+
+
+community_search_index = FullTextIndex(
+    Community, ("title", "communityurl", "introduction")
+)
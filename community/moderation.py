@@ -0,0 +1,102 @@
+"""커뮤니티 금지어 검사
+
+커뮤니티별 금지어 목록을 Aho-Corasick 오토마톤으로 컴파일해서 worker 프로세스에 캐시한다.
+금지어가 추가/삭제되면 공유 캐시(Redis)의 버전 값을 바꿔서 모든 worker 가 다시 컴파일하게 한다.
+버전 값이 다른 worker 에 전달되지 않는 경우(캐시가 프로세스 메모리 등)에도
+MATCHER_TTL 이 지나면 다시 컴파일한다.
+"""
+import time
+from collections import deque
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from .models import ForbiddenWord
+
+VERSION_KEY = "forbiddenword:version:{}"
+MATCHER_TTL = 60
+
+# 제목과 본문 사이 구분자, 금지어가 두 필드에 걸쳐서 매칭되지 않도록
+TEXT_SEPARATOR = "\0"
+
+_matchers = {}
+
+
+class WordMatcher:
+    """Aho-Corasick 오토마톤, 텍스트를 한 번만 훑어서 모든 금지어를 찾는다"""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for word in words:
+            if word:
+                self.add_word(word)
+        self.build_fail_links()
+
+    def add_word(self, word):
+        node = 0
+        for char in word:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.output[node].append(word)
+
+    def build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def find_all(self, text):
+        """등장 순서대로 중복 없이 매칭된 금지어 목록"""
+        found = {}
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for word in self.output[node]:
+                found.setdefault(word, None)
+        return list(found)
+
+
+def get_matcher(community_id):
+    key = VERSION_KEY.format(community_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    now = time.monotonic()
+    cached = _matchers.get(community_id)
+    if cached and cached[0] == version and now - cached[1] < MATCHER_TTL:
+        return cached[2]
+    words = ForbiddenWord.objects.filter(community_id=community_id).values_list(
+        "word", flat=True
+    )
+    matcher = WordMatcher(words)
+    _matchers[community_id] = (version, now, matcher)
+    return matcher
+
+
+def find_forbidden_words(community_id, *texts):
+    """texts 에 포함된 커뮤니티 금지어 목록, 없으면 빈 리스트"""
+    text = TEXT_SEPARATOR.join(str(text) for text in texts if text)
+    if not text:
+        return []
+    return get_matcher(community_id).find_all(text)
+
+
+def invalidate_forbidden_words(community_id):
+    """금지어 변경 후 호출, 모든 worker 의 오토마톤을 다시 만들게 한다"""
+    cache.set(VERSION_KEY.format(community_id), uuid4().hex, None)
@@ -0,0 +1,98 @@
+"""커뮤니티 관리자 권한
+
+유저의 전체 커뮤니티 역할을 쿼리 1번으로 가져와서 요청 단위로 기억하고, 요청 사이에는
+캐시에 둔다. CommunityAdmin 이 바뀌면 signal 로 해당 유저의 캐시를 지운다.
+캐시가 프로세스 메모리(REDIS_URL 없음)면 다른 프로세스의 캐시는 지울 수 없으므로
+권한 회수가 늦어도 LOCAL_ROLES_TIMEOUT 안에 반영되도록 짧게 둔다.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import exceptions, permissions, status
+
+from .models import CommunityAdmin
+
+ADMIN = "admin"
+SUBADMIN = "subadmin"
+ROLES_KEY = "communityroles:{}"
+ROLES_TIMEOUT = 60 * 60
+LOCAL_ROLES_TIMEOUT = 10
+
+
+def load_roles(user_id):
+    """{community_id: ADMIN | SUBADMIN}"""
+    key = ROLES_KEY.format(user_id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = {}
+        rows = CommunityAdmin.objects.filter(user_id=user_id).values_list(
+            "community_id", "is_comuadmin", "is_subadmin"
+        )
+        for community_id, is_comuadmin, is_subadmin in rows:
+            if is_comuadmin:
+                roles[community_id] = ADMIN
+            elif is_subadmin:
+                roles.setdefault(community_id, SUBADMIN)
+        cache.set(
+            key,
+            roles,
+            ROLES_TIMEOUT if settings.REDIS_URL else LOCAL_ROLES_TIMEOUT,
+        )
+    return roles
+
+
+def get_roles(request):
+    """요청한 유저의 역할, 같은 요청 안에서는 한 번만 조회"""
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "_community_roles"):
+        user = request.user
+        request._community_roles = (
+            load_roles(user.id) if user and user.is_authenticated else {}
+        )
+    return request._community_roles
+
+
+def get_role(request, community_id):
+    return get_roles(request).get(community_id)
+
+
+def is_community_staff(request, community_id):
+    """관리자 또는 서브 관리자"""
+    return get_role(request, community_id) in (ADMIN, SUBADMIN)
+
+
+def invalidate_roles(user_id):
+    cache.delete(ROLES_KEY.format(user_id))
+
+
+@receiver([post_save, post_delete], sender=CommunityAdmin)
+def invalidate_community_admin(sender, instance, **kwargs):
+    invalidate_roles(instance.user_id)
+
+
+class CommunityPermissionDenied(exceptions.APIException):
+    status_code = status.HTTP_401_UNAUTHORIZED
+    default_detail = {"message": "권한이 없습니다."}
+
+
+class IsCommunityStaffOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
+    """
+    조회는 누구나, 수정은 커뮤니티 관리자/서브 관리자만
+    view 에서 check_object_permissions(request, community) 로 확인
+    """
+
+    roles = (ADMIN, SUBADMIN)
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if get_role(request, obj.id) in self.roles:
+            return True
+        raise CommunityPermissionDenied()
+
+
+class IsCommunityAdminOrReadOnly(IsCommunityStaffOrReadOnly):
+    """조회는 누구나, 수정은 커뮤니티 관리자만"""
+
+    roles = (ADMIN,)
@@ -1,4 +1,6 @@
 import re
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
 from decouple import config
 
@@ -8,8 +10,78 @@ from feed.serializers import FeedListSerializer, FeedTitleSerializer
 from .models import Community, CommunityAdmin, ForbiddenWord
 from .validators import can_only_eng_int_underbar_and_hyphen
 
+# 커뮤니티 카드에 함께 보여줄 게시글 수
+TOP_FEEDS_SIZE = 5
+TOP_FEEDS_ORDERING = {
+    "recent": [F("created_at").desc(), F("id").desc()],
+    "popular": [F("like_count").desc(), F("view_count").desc(), F("id").desc()],
+}
+
+
+def get_top_feeds(community_ids, queryset=None, size=TOP_FEEDS_SIZE, order="recent"):
+    """커뮤니티별 상위 size 개 게시글 {community_id: [feed, ...]}, 쿼리 1번"""
+    if queryset is None:
+        queryset = Feed.objects.all()
+    ordering = TOP_FEEDS_ORDERING.get(order, TOP_FEEDS_ORDERING["recent"])
+    feeds = (
+        queryset.filter(community_id__in=community_ids)
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=F("community_id"),
+                order_by=ordering,
+            ),
+        )
+        .filter(rank__lte=size)
+        .order_by("community_id", "rank")
+    )
+    top_feeds = {community_id: [] for community_id in community_ids}
+    for feed in feeds:
+        top_feeds[feed.community_id].append(feed)
+    return top_feeds
+
+
+class DynamicFieldsMixin:
+    """
+    `?fields=id,title` 로 필요한 필드만, `?omit=feeds` 로 특정 필드를 빼고 응답
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        params = request.query_params
+        if params.get("fields"):
+            allowed = set(params["fields"].split(","))
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+        for name in params.get("omit", "").split(","):
+            self.fields.pop(name, None)
+
+
+class TopFeedsMixin:
+    """목록 전체 커뮤니티의 상위 게시글을 한 번에 가져와서 context 에 보관"""
+
+    top_feeds_queryset = None
+
+    def get_top_feeds(self, obj):
+        if "top_feeds" not in self.context:
+            parent = self.parent
+            instances = parent.instance if parent is not None else [obj]
+            request = self.context.get("request")
+            order = request.query_params.get("feed_order") if request else None
+            self.context["top_feeds"] = get_top_feeds(
+                [instance.id for instance in instances],
+                self.top_feeds_queryset,
+                order=order,
+            )
+        return self.context["top_feeds"].get(obj.id, [])
 
-class CommunitySerializer(serializers.ModelSerializer):
+
+class CommunitySerializer(
+    DynamicFieldsMixin, TopFeedsMixin, serializers.ModelSerializer
+):
     imageurl = serializers.SerializerMethodField()
     bookmarked = serializers.SerializerMethodField()
     is_bookmarked = serializers.SerializerMethodField()
@@ -18,6 +90,8 @@ class CommunitySerializer(serializers.ModelSerializer):
     feeds = serializers.SerializerMethodField()
     admin = serializers.SerializerMethodField()
 
+    top_feeds_queryset = FeedListSerializer.setup_eager_loading(Feed.objects.all())
+
     class Meta:
         model = Community
         fields = [
@@ -61,8 +135,7 @@ class CommunitySerializer(serializers.ModelSerializer):
         return category_name_list
 
     def get_feeds(self, obj):
-        feeds = Feed.objects.filter(category__community=obj)
-        feed = FeedListSerializer(feeds, many=True)
+        feed = FeedListSerializer(self.get_top_feeds(obj), many=True)
         return feed.data
 
     def get_admin(self, obj):
@@ -163,7 +236,9 @@ class CommunityCreateSerializer(serializers.ModelSerializer):
         return False
 
 
-class CommunityListSerializer(serializers.ModelSerializer):
+class CommunityListSerializer(
+    DynamicFieldsMixin, TopFeedsMixin, serializers.ModelSerializer
+):
     imageurl = serializers.SerializerMethodField()
     categories = serializers.SerializerMethodField()
     feeds = serializers.SerializerMethodField()
@@ -198,8 +273,7 @@ class CommunityListSerializer(serializers.ModelSerializer):
         return category_name_list
 
     def get_feeds(self, obj):
-        feeds = Feed.objects.filter(category__community=obj)
-        feed = FeedTitleSerializer(feeds, many=True)
+        feed = FeedTitleSerializer(self.get_top_feeds(obj), many=True)
         return feed.data
 
     def get_bookmarked(self, obj):
@@ -1,9 +1,17 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 
 from user.models import User
+from feed.models import Category, Feed
 from community.models import Community, CommunityAdmin, ForbiddenWord
+from community.roles import LOCAL_ROLES_TIMEOUT, load_roles
+from community.moderation import MATCHER_TTL, WordMatcher, find_forbidden_words
 
 
 class CommunityViewTest(APITestCase):
@@ -39,6 +47,7 @@ class CommunityViewTest(APITestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.access_token = self.client.post(reverse("login"), self.user_data).data[
             "access"
         ]
@@ -53,6 +62,45 @@ class CommunityViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    def test_get_community_top_feeds(self):
+        """커뮤니티 카드에는 최신 게시글 TOP_FEEDS_SIZE 개만"""
+        category = Category.objects.create(
+            community=self.community, category_name="얘기해요", category_url="talk"
+        )
+        feeds = [
+            Feed.objects.create(user=self.user, category=category, title=f"title{i}")
+            for i in range(7)
+        ]
+        response = self.client.get(self.path)
+        card = response.data["results"][0]
+        ids = [feed["id"] for feed in card["feeds"]]
+        self.assertEqual(ids, [feed.id for feed in feeds[::-1][:5]])
+        response = self.client.get(self.path_name)
+        self.assertEqual(len(response.data["data"]["feeds"]), 5)
+
+    def test_get_community_omit_feeds(self):
+        """omit, fields 로 응답 필드 선택"""
+        response = self.client.get(self.path, {"omit": "feeds"})
+        self.assertNotIn("feeds", response.data["results"][0])
+        response = self.client.get(self.path, {"fields": "id,title"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+
+    def test_get_community_random_pages(self):
+        """같은 seed 로 이어서 조회하면 중복, 누락 없이 한 바퀴"""
+        cache.clear()
+        for i in range(3, 8):
+            Community.objects.create(
+                title=f"title{i}", communityurl=f"title{i}", introduction="intro"
+            )
+        first = self.client.get(self.path, {"page_size": 4})
+        second = self.client.get(first.data["next"])
+        self.assertIsNone(second.data["next"])
+        self.assertEqual(first.data["seed"], second.data["seed"])
+        ids = [c["id"] for c in first.data["results"] + second.data["results"]]
+        self.assertCountEqual(ids, Community.objects.values_list("id", flat=True))
+        again = self.client.get(self.path, {"page_size": 4, "seed": first.data["seed"]})
+        self.assertEqual(again.data["results"], first.data["results"])
+
     def test_fail_if_not_logged_in(self):
         """커뮤니티 생성시 로그인 확인"""
         response = self.client.post(self.path, self.community_data)
@@ -246,6 +294,7 @@ class CommunitySubAdminViewTest(APITestCase):
         cls.exist_subadmin_data = {"user": 2}
 
     def setUp(self):
+        cache.clear()
         self.access_token = self.client.post(reverse("login"), self.user_data).data[
             "access"
         ]
@@ -295,6 +344,53 @@ class CommunitySubAdminViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, 400)
 
+    def test_subadmin_role_cache(self):
+        """서브 관리자 등록/삭제시 권한 캐시 갱신"""
+        forbidden_path = reverse(
+            "community_forbidden_view", kwargs={"community_url": "title1"}
+        )
+        access_token3 = self.client.post(reverse("login"), self.user_data3).data[
+            "access"
+        ]
+        response = self.client.post(
+            forbidden_path,
+            {"word": "금지"},
+            HTTP_AUTHORIZATION=f"Bearer {access_token3}",
+        )
+        self.assertEqual(response.status_code, 401)
+
+        self.client.post(
+            self.path,
+            {"user": self.user3.id},
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        response = self.client.post(
+            forbidden_path,
+            {"word": "금지"},
+            HTTP_AUTHORIZATION=f"Bearer {access_token3}",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.client.delete(
+            self.path,
+            {"user": self.user3.id},
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        response = self.client.post(
+            forbidden_path,
+            {"word": "금지어"},
+            HTTP_AUTHORIZATION=f"Bearer {access_token3}",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(REDIS_URL="")
+    def test_subadmin_role_cache_local_timeout(self):
+        """공유 캐시가 없으면 다른 프로세스에 남은 권한이 빨리 만료되도록 짧게 캐시"""
+        cache.clear()
+        with mock.patch.object(cache, "set") as cache_set:
+            load_roles(self.user3.id)
+        self.assertEqual(cache_set.call_args.args[2], LOCAL_ROLES_TIMEOUT)
+
     def test_post_subadmin_no_comu(self):
         """community 없을 때 sub admin 생성 실패"""
         response = self.client.post(
@@ -392,6 +488,7 @@ class CommunityForbiddenViewTest(APITestCase):
         ForbiddenWord.objects.create(word="word2", community=cls.community)
 
     def setUp(self):
+        cache.clear()
         self.access_token = self.client.post(reverse("login"), self.user_data).data[
             "access"
         ]
@@ -457,6 +554,76 @@ class CommunityForbiddenViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, 201)
 
+    def test_forbiddenword_matcher_invalidate(self):
+        """금지어 등록/삭제 시 금지어 검사 결과 바로 반영"""
+        text = "forbidden keyword"
+        self.assertEqual(find_forbidden_words(self.community.id, text), [])
+
+        self.client.post(
+            path=self.path,
+            data=self.word_data,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.assertEqual(find_forbidden_words(self.community.id, text), ["word"])
+
+        self.client.delete(
+            path=reverse(
+                "community_forbidden_view",
+                kwargs={"community_url": "title1", "forbidden_word": "word"},
+            ),
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.assertEqual(find_forbidden_words(self.community.id, text), [])
+
+    def test_forbiddenword_matcher_ttl(self):
+        """버전 값이 전달되지 않은 worker 도 MATCHER_TTL 이 지나면 다시 컴파일"""
+        cache.clear()
+        text = "forbidden keyword"
+        self.assertEqual(find_forbidden_words(self.community.id, text), [])
+        # 다른 프로세스에서 추가되어 이 프로세스의 버전 값은 그대로인 경우
+        ForbiddenWord.objects.create(word="keyword", community=self.community)
+        self.assertEqual(find_forbidden_words(self.community.id, text), [])
+        with mock.patch(
+            "community.moderation.time.monotonic",
+            return_value=time.monotonic() + MATCHER_TTL,
+        ):
+            self.assertEqual(find_forbidden_words(self.community.id, text), ["keyword"])
+
+
+class WordMatcherTest(SimpleTestCase):
+    def test_find_all_overlapping_words(self):
+        """겹치는 금지어를 한 번에 모두 찾기"""
+        matcher = WordMatcher(["he", "she", "his", "hers"])
+        self.assertEqual(matcher.find_all("ushers"), ["she", "he", "hers"])
+
+    def test_find_all_no_match(self):
+        """금지어 없을 때 빈 리스트"""
+        matcher = WordMatcher(["바보", "멍청이"])
+        self.assertEqual(matcher.find_all("좋은 하루 보내세요"), [])
+
+
+class SearchCommunityViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.community = Community.objects.create(
+            title="자취생", communityurl="alone", introduction="자취생 모여라"
+        )
+        Community.objects.create(
+            title="반려견", communityurl="puppy", introduction="강아지 산책"
+        )
+        cls.path = reverse("search_community_view")
+
+    def test_search_community(self):
+        """커뮤니티 소개 검색"""
+        response = self.client.get(self.path, {"search": "자취생"})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.community.id)
+
+    def test_search_community_no_search(self):
+        """검색어 없으면 전체 최신순"""
+        response = self.client.get(self.path)
+        self.assertEqual(len(response.data["results"]), 2)
+
 
 class CommunityBookmarkViewTest(APITestCase):
     @classmethod
@@ -1,6 +1,6 @@
 from django.db.models import Q
 
-from rest_framework import permissions, status, filters
+from rest_framework import permissions, status
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -10,7 +10,11 @@ from django.shortcuts import redirect
 from user.models import User
 from user.serializers import SearchUserSerializer
 from feed.models import Feed
-from .models import Community, CommunityAdmin, ForbiddenWord
+from BFFs.sampling import RandomSamplePagination
+from BFFs.search import FullTextSearchPagination
+from .models import Community, CommunityAdmin, ForbiddenWord, community_search_index
+from .moderation import invalidate_forbidden_words
+from .roles import IsCommunityAdminOrReadOnly, IsCommunityStaffOrReadOnly
 from .serializers import (
     CommunitySerializer,
     CommunityCategorySerializer,
@@ -25,13 +29,16 @@ from .serializers import (
 class CommunityView(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    pagination_class = RandomSamplePagination
+
     def get(self, request):
-        """커뮤니티 조회 및 북마크, 어드민 조회"""
-        communities = Community.objects.all().order_by("?")
+        """커뮤니티 랜덤 조회 및 북마크, 어드민 조회"""
+        paginator = self.pagination_class()
+        communities = paginator.paginate_queryset(Community.objects.all(), request)
         serializer = CommunityListSerializer(
             communities, context={"request": request}, many=True
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         """커뮤니티 생성 신청시 유저 어드민 등록까지"""
@@ -48,7 +55,10 @@ class CommunityView(APIView):
 
 
 class CommunityDetailView(APIView):
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    def get_permissions(self):
+        if self.request.method == "DELETE":
+            return [IsCommunityAdminOrReadOnly()]
+        return [IsCommunityStaffOrReadOnly()]
 
     def get(self, request, community_url):
         """커뮤니티 관리자 페이지에서 조회 및 북마크, 어드민 조회"""
@@ -62,36 +72,21 @@ class CommunityDetailView(APIView):
     def put(self, request, community_url):
         """커뮤니티 수정"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-        community_subadmin = [
-            admin.user for admin in community.comu.filter(is_subadmin=True)
-        ]
-        if community_admin == request.user or request.user in community_subadmin:
-            serializer = CommunityUpdateSerializer(community, data=request.data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(
-                {"data": serializer.data, "message": "수정이 완료되었습니다."},
-                status=status.HTTP_200_OK,
-            )
-        else:
-            return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
-            )
+        self.check_object_permissions(request, community)
+        serializer = CommunityUpdateSerializer(community, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(
+            {"data": serializer.data, "message": "수정이 완료되었습니다."},
+            status=status.HTTP_200_OK,
+        )
 
     def delete(self, request, community_url):
         """커뮤니티 삭제"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-        if community_admin == request.user:
-            community.delete()
-            return Response(
-                {"message": "삭제가 완료되었습니다."}, status=status.HTTP_204_NO_CONTENT
-            )
-        else:
-            return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
-            )
+        self.check_object_permissions(request, community)
+        community.delete()
+        return Response({"message": "삭제가 완료되었습니다."}, status=status.HTTP_204_NO_CONTENT)
 
 
 class CommunityCategoryView(APIView):
@@ -108,7 +103,7 @@ class CommunityCategoryView(APIView):
 
 
 class CommunitySubAdminView(APIView):
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [IsCommunityAdminOrReadOnly]
 
     def get(self, request, community_url):
         """어드민 등록을 위한 현재 커뮤니티의 유저를 제외한 전체 유저 조회"""
@@ -130,53 +125,42 @@ class CommunitySubAdminView(APIView):
     def post(self, request, community_url):
         """서브 어드민 등록"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-
-        if community_admin == request.user:
-            if community.comu.filter(user_id=request.data["user"]).exists():
-                return Response(
-                    {"message": "이미 관리자로 등록된 유저입니다."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            elif community.comu.filter(community_id=community.id).count() > 3:
-                return Response(
-                    {"message": "서브 관리자는 최대 3명입니다."}, status=status.HTTP_400_BAD_REQUEST
-                )
-            else:
-                serializer = CommunityAdminCreateSerializer(data=request.data)
-                serializer.is_valid(raise_exception=True)
-                serializer.save(community=community, is_subadmin=True)
-                return Response(
-                    {"message": "서브 관리자 등록이 완료되었습니다."}, status=status.HTTP_201_CREATED
-                )
+        self.check_object_permissions(request, community)
+        if community.comu.filter(user_id=request.data["user"]).exists():
+            return Response(
+                {"message": "이미 관리자로 등록된 유저입니다."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        elif community.comu.filter(community_id=community.id).count() > 3:
+            return Response(
+                {"message": "서브 관리자는 최대 3명입니다."}, status=status.HTTP_400_BAD_REQUEST
+            )
         else:
+            serializer = CommunityAdminCreateSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(community=community, is_subadmin=True)
             return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
+                {"message": "서브 관리자 등록이 완료되었습니다."}, status=status.HTTP_201_CREATED
             )
 
     def delete(self, request, community_url):
         """서브 어드민 삭제"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-        if community_admin == request.user:
-            if community.comu.filter(user_id=request.data["user"]).exists():
-                community.comu.filter(user_id=request.data["user"]).delete()
-                return Response(
-                    {"message": "서브 관리자 삭제가 완료되었습니다."}, status=status.HTTP_200_OK
-                )
-            else:
-                return Response(
-                    {"message": "존재하지 않는 서브 관리자입니다."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        self.check_object_permissions(request, community)
+        if community.comu.filter(user_id=request.data["user"]).exists():
+            community.comu.filter(user_id=request.data["user"]).delete()
+            return Response(
+                {"message": "서브 관리자 삭제가 완료되었습니다."}, status=status.HTTP_200_OK
+            )
         else:
             return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
+                {"message": "존재하지 않는 서브 관리자입니다."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
 
 class CommunityForbiddenView(APIView):
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    permission_classes = [IsCommunityStaffOrReadOnly]
 
     def get(self, request, community_url):
         """커뮤니티 금지어 조회"""
@@ -188,48 +172,30 @@ class CommunityForbiddenView(APIView):
     def post(self, request, community_url):
         """커뮤니티 금지어 생성"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-        community_subadmin = [
-            admin.user for admin in community.comu.filter(is_subadmin=True)
-        ]
-        if community_admin == request.user or request.user in community_subadmin:
-            text = request.data["word"].strip()
-            if text not in [
-                forbidden.word
-                for forbidden in ForbiddenWord.objects.filter(community_id=community.id)
-            ]:
-                serializer = ForbiddenWordSerializer(data=request.data)
-                serializer.is_valid(raise_exception=True)
-                serializer.save(community=community)
-                return Response(
-                    {"message": "등록이 완료되었습니다."}, status=status.HTTP_201_CREATED
-                )
-            else:
-                return Response(
-                    {"message": "이미 등록된 금지어입니다."}, status=status.HTTP_400_BAD_REQUEST
-                )
+        self.check_object_permissions(request, community)
+        text = request.data["word"].strip()
+        if text not in [
+            forbidden.word
+            for forbidden in ForbiddenWord.objects.filter(community_id=community.id)
+        ]:
+            serializer = ForbiddenWordSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(community=community)
+            invalidate_forbidden_words(community.id)
+            return Response({"message": "등록이 완료되었습니다."}, status=status.HTTP_201_CREATED)
         else:
             return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
+                {"message": "이미 등록된 금지어입니다."}, status=status.HTTP_400_BAD_REQUEST
             )
 
     def delete(self, request, community_url, forbidden_word):
         """커뮤니티 금지어 삭제"""
         community = get_object_or_404(Community, communityurl=community_url)
-        community_admin = community.comu.get(is_comuadmin=True).user
-        community_subadmin = [
-            admin.user for admin in community.comu.filter(is_subadmin=True)
-        ]
-        if community_admin == request.user or request.user in community_subadmin:
-            word = ForbiddenWord.objects.get(
-                word=forbidden_word, community_id=community.id
-            )
-            word.delete()
-            return Response({"message": "금지어 삭제가 완료되었습니다."}, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {"message": "권한이 없습니다."}, status=status.HTTP_401_UNAUTHORIZED
-            )
+        self.check_object_permissions(request, community)
+        word = ForbiddenWord.objects.get(word=forbidden_word, community_id=community.id)
+        word.delete()
+        invalidate_forbidden_words(community.id)
+        return Response({"message": "금지어 삭제가 완료되었습니다."}, status=status.HTTP_200_OK)
 
 
 class CommunityBookmarkView(APIView):
@@ -247,10 +213,12 @@ class CommunityBookmarkView(APIView):
 
 
 class SearchCommunityView(ListAPIView):
-    """커뮤니티 조회 및 검색"""
+    """
+    커뮤니티 조회 및 검색
+    응답은 목록 배열이 아니라 {"next": 다음 페이지 URL, "results": 목록} (README API 변경 사항)
+    """
 
     queryset = Community.objects.all()
     serializer_class = CommunityListSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "communityurl", "introduction"]
-    pagination_class = None
+    pagination_class = FullTextSearchPagination
+    search_index = community_search_index
@@ -1,8 +1,6 @@
 from django_cron import CronJobBase, Schedule
-from django.utils import timezone
 
-from feed.models import GroupPurchase
-from .tasks import image_delete_job
+from .tasks import image_delete_job, flush_view_counts_job, sweep_grouppurchases_job
 
 
 class ImageDeleteJob(CronJobBase):
@@ -15,15 +13,26 @@ class ImageDeleteJob(CronJobBase):
 
 
 class MyPurchaseCronJob(CronJobBase):
-    RUN_EVERY_MINS = 5
+    """
+    공구 마감은 close_at 에 예약된 task 가 처리하고,
+    이 job 은 예약이 누락된 공구 마감 + 곧 마감될 공구 예약
+    """
+
+    # feed.tasks.CLOSE_SCHEDULE_HORIZON 보다 짧아야 예약이 빠지지 않는다
+    RUN_EVERY_MINS = 10
 
     schedule = Schedule(run_every_mins=RUN_EVERY_MINS)
     code = "feed.my_purchase_job"
 
     def do(self):
-        now = timezone.now()
-        code = "feed.my_purchase_job"
+        sweep_grouppurchases_job.delay()
+
+
+class ViewCountFlushJob(CronJobBase):
+    RUN_EVERY_MINS = 1
 
-        end_grouppuchase = GroupPurchase.objects.filter(close_at__lte=now).update(
-            is_ended=True
-        )
+    schedule = Schedule(run_every_mins=RUN_EVERY_MINS)
+    code = "feed.view_count_flush_job"
+
+    def do(self):
+        flush_view_counts_job.delay()
@@ -0,0 +1,143 @@
+"""게시글 이미지 참조 인덱스와 사용하지 않는 이미지 정리
+
+에디터 이미지는 업로드 즉시 media/feed 에 저장되고 본문에는 URL 로만 들어간다.
+Feed/GroupPurchase 저장시 본문의 이미지 이름을 ImageReference 에 반영해두고,
+정리할 때는 파일을 batch 단위로 읽어 인덱스에 없는 것만 지운다.
+전체 게시글을 읽지 않으므로 게시글 수와 무관하게 파일 수만큼만 일한다.
+인덱스가 기존 게시글로 다 채워졌다는 표시(REFERENCES_BUILT_KEY)가 없으면 먼저 채우고 지운다.
+배포 직후처럼 인덱스가 비어 있을 때 모든 이미지를 지우지 않도록.
+"""
+import os
+import re
+import time
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from feed.models import Feed, GroupPurchase, ImageReference
+
+IMAGE_DIR = "feed"
+IMAGE_NAME_RE = re.compile(r"/media/feed/([\w.-]+)")
+# 업로드 후 게시글 저장 전인 이미지를 지우지 않도록
+GRACE_PERIOD = timezone.timedelta(days=1)
+BATCH_SIZE = 500
+# cache 에서 사라지면 다음 정리 때 인덱스를 다시 맞춘 뒤 지운다
+REFERENCES_BUILT_KEY = "images:references:built"
+
+
+def extract_image_names(content):
+    return set(IMAGE_NAME_RE.findall(content or ""))
+
+
+def sync_image_references(instance):
+    """본문 이미지와 인덱스가 다를 때만 추가/삭제"""
+    field = "feed" if isinstance(instance, Feed) else "grouppurchase"
+    names = extract_image_names(instance.content)
+    references = ImageReference.objects.filter(**{field: instance})
+    indexed = set(references.values_list("name", flat=True))
+    if indexed - names:
+        references.filter(name__in=indexed - names).delete()
+    ImageReference.objects.bulk_create(
+        [ImageReference(name=name, **{field: instance}) for name in names - indexed]
+    )
+
+
+def sync_image_reference_batch(field, rows):
+    """[(게시글 id, 본문)] 의 인덱스를 본문과 같게, (추가, 삭제) 수 반환"""
+    column = f"{field}_id"
+    names = {
+        (pk, name) for pk, content in rows for name in extract_image_names(content)
+    }
+    references = ImageReference.objects.filter(
+        **{f"{column}__in": [pk for pk, _ in rows]}
+    )
+    indexed = {
+        (pk, name): reference_id
+        for reference_id, pk, name in references.values_list("id", column, "name")
+    }
+    stale = [indexed[key] for key in indexed.keys() - names]
+    deleted = ImageReference.objects.filter(id__in=stale).delete()[0] if stale else 0
+    created = ImageReference.objects.bulk_create(
+        [
+            ImageReference(name=name, **{column: pk})
+            for pk, name in names - indexed.keys()
+        ]
+    )
+    return len(created), deleted
+
+
+def rebuild_image_references(batch_size=BATCH_SIZE):
+    """
+    기존 게시글로 인덱스를 batch 단위로 맞추고 완료 표시, 추가한 참조 수 반환
+    전체를 지우고 다시 채우지 않으므로 정리 작업과 동시에 돌아도 참조가 비는 순간이 없다
+    """
+    created = 0
+    for model, field in ((Feed, "feed"), (GroupPurchase, "grouppurchase")):
+        rows = model.objects.order_by("id").values_list("id", "content")
+        batch = []
+        for row in rows.iterator(batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                created += sync_image_reference_batch(field, batch)[0]
+                batch = []
+        if batch:
+            created += sync_image_reference_batch(field, batch)[0]
+    cache.set(REFERENCES_BUILT_KEY, True, None)
+    return created
+
+
+def iter_image_batches(directory, grace_period, batch_size):
+    """grace_period 보다 오래된 파일을 batch_size 개씩, scandir 로 목록 전체를 올리지 않는다"""
+    cutoff = time.time() - grace_period.total_seconds()
+    batch = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            batch.append((entry.name, stat.st_size))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def collect_orphan_images(
+    dry_run=False, grace_period=GRACE_PERIOD, batch_size=BATCH_SIZE
+):
+    """
+    인덱스에 없는 media/feed 이미지 삭제, dry_run 이면 지우지 않고 결과만
+    인덱스가 아직 다 채워지지 않았으면 먼저 rebuild_image_references
+    {"scanned", "orphans", "deleted", "bytes", "names"} 반환, names 는 dry_run 일 때만
+    """
+    report = {"scanned": 0, "orphans": 0, "deleted": 0, "bytes": 0, "names": []}
+    directory = default_storage.path(IMAGE_DIR)
+    if not os.path.isdir(directory):
+        return report
+    if not cache.get(REFERENCES_BUILT_KEY):
+        rebuild_image_references(batch_size)
+    for batch in iter_image_batches(directory, grace_period, batch_size):
+        report["scanned"] += len(batch)
+        used = set(
+            ImageReference.objects.filter(
+                name__in=[name for name, _ in batch]
+            ).values_list("name", flat=True)
+        )
+        for name, size in batch:
+            if name in used:
+                continue
+            report["orphans"] += 1
+            report["bytes"] += size
+            if dry_run:
+                report["names"].append(name)
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            report["deleted"] += 1
+    return report
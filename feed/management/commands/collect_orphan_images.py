@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from feed.images import (
+    BATCH_SIZE,
+    GRACE_PERIOD,
+    collect_orphan_images,
+    rebuild_image_references,
+)
+
+
+class Command(BaseCommand):
+    help = "본문에서 쓰지 않는 media/feed 이미지 정리, --dry-run 이면 목록만 출력"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--rebuild-index",
+            action="store_true",
+            help="기존 게시글로 이미지 참조 인덱스 다시 맞추기, 처음 정리할 때는 자동",
+        )
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=GRACE_PERIOD.total_seconds() / 3600,
+            help="업로드 후 이 시간이 지나지 않은 이미지는 건너뜀",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["rebuild_index"]:
+            created = rebuild_image_references(options["batch_size"])
+            self.stdout.write(f"이미지 참조 인덱스 추가: {created}개")
+
+        report = collect_orphan_images(
+            dry_run=options["dry_run"],
+            grace_period=timezone.timedelta(hours=options["grace_hours"]),
+            batch_size=options["batch_size"],
+        )
+        for name in report["names"]:
+            self.stdout.write(name)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"검사 {report['scanned']}개, 미사용 {report['orphans']}개"
+                f"({report['bytes']} bytes), 삭제 {report['deleted']}개"
+            )
+        )
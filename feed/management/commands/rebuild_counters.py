@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from feed.models import (
+    Cocomment,
+    Comment,
+    Feed,
+    GroupPurchase,
+    JoinedUser,
+    count_subquery,
+)
+
+
+class Command(BaseCommand):
+    help = "Feed, GroupPurchase의 댓글/좋아요/참여인원/신청수량 카운터를 실제 데이터로 다시 계산"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        feeds = Feed.objects.update(
+            comment_count=count_subquery(
+                Comment.objects.filter(feed=OuterRef("pk")), "feed"
+            )
+            + count_subquery(
+                Cocomment.objects.filter(comment__feed=OuterRef("pk")), "comment__feed"
+            ),
+            like_count=count_subquery(
+                Feed.likes.through.objects.filter(feed=OuterRef("pk")), "feed"
+            ),
+        )
+        grouppurchases = GroupPurchase.objects.update(
+            joined_count=count_subquery(
+                JoinedUser.objects.filter(
+                    grouppurchase=OuterRef("pk"), is_deleted=False
+                ),
+                "grouppurchase",
+            ),
+            reserved_quantity=Coalesce(
+                Subquery(
+                    JoinedUser.objects.filter(
+                        grouppurchase=OuterRef("pk"), is_deleted=False
+                    )
+                    .order_by()
+                    .values("grouppurchase")
+                    .annotate(total=Sum("product_quantity"))
+                    .values("total"),
+                    output_field=IntegerField(),
+                ),
+                0,
+            ),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"카운터 재계산 완료: feed {feeds}개, 공구 {grouppurchases}개")
+        )
@@ -1,15 +1,42 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    F,
+    IntegerField,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Now
 from django.utils import timezone
 from hitcount.models import HitCountMixin
 
+from BFFs.search import FullTextIndex
 from community.models import Community
 from user.models import User
+from feed.viewcount import record_view
 
 import os
 from uuid import uuid4
 
 
+def count_subquery(queryset, field):
+    """OuterRef 기준 COUNT 서브쿼리 (join으로 row가 불어나지 않도록 분리)"""
+    subquery = (
+        queryset.order_by().values(field).annotate(count=Count("id")).values("count")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def increase_count(queryset, field, amount=1):
+    """F() 기반 카운터 증감, 동시 요청에서도 누락 없이 반영"""
+    queryset.update(**{field: Greatest(F(field) + amount, 0)})
+
+
 class Feed(models.Model, HitCountMixin):
     """일반 게시글 모델"""
 
@@ -22,6 +49,14 @@ class Feed(models.Model, HitCountMixin):
         related_name="feed_category",
         blank=False,
     )
+    # category.community 복사본, 커뮤니티 전체 목록을 인덱스로 읽기 위해 둔다
+    community = models.ForeignKey(
+        Community,
+        on_delete=models.CASCADE,
+        related_name="community_feed",
+        null=True,
+        editable=False,
+    )
     title = models.CharField(max_length=50)
     content = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -30,17 +65,29 @@ class Feed(models.Model, HitCountMixin):
         "user.User", blank=True, default=[], related_name="feed_likes"
     )
     is_notification = models.BooleanField(default=False)
+    comment_count = models.PositiveIntegerField(default=0, help_text="댓글 + 대댓글 수")
+    like_count = models.PositiveIntegerField(default=0)
 
     # 조회수 코드
     view_count = models.PositiveIntegerField(default=0)
 
     def click(self):
-        self.view_count += 1
-        self.save()
+        """조회수 버퍼에 기록, feed.tasks.flush_view_counts_job 이 DB에 반영"""
+        record_view(self)
+
+    def save(self, *args, **kwargs):
+        if self.community_id is None:
+            self.community_id = self.category.community_id
+        super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "일반 게시글(Feed)"
         verbose_name_plural = "일반 게시글(Feed)"
+        # 커뮤니티 전체 / 카테고리별 목록 keyset 페이지네이션용
+        indexes = [
+            models.Index(fields=["community", "-created_at", "-id"]),
+            models.Index(fields=["category", "-created_at", "-id"]),
+        ]
 
 
 class Category(models.Model):
@@ -120,6 +167,48 @@ class GroupPurchaseMapData(models.Model):
         return f"{str(self.location_address)}, x: {self.coordinate_x}, y: {self.coordinate_y}"
 
 
+class GroupPurchaseQuerySet(models.QuerySet):
+    STATUS_OPEN = "진행 중"
+    STATUS_BEFORE = "시작 전"
+    STATUS_ENDED = "종료"
+
+    def with_status(self):
+        """
+        DB 현재 시간 기준 공구 상태(시작 전/진행 중/종료) grouppurchase_status annotation
+        cron 이 아직 is_ended 를 못 바꿨어도 close_at 이 지났으면 종료
+        응답 표시용, 필터와 정렬은 시간에 따라 값이 바뀌지 않는 컬럼 조건으로 한다
+        """
+        return self.annotate(
+            grouppurchase_status=Case(
+                When(self.status_q("ended"), then=Value(self.STATUS_ENDED)),
+                When(open_at__gt=Now(), then=Value(self.STATUS_BEFORE)),
+                default=Value(self.STATUS_OPEN),
+                output_field=CharField(),
+            ),
+        )
+
+    @staticmethod
+    def status_q(status):
+        """`?status=open|before|ended` 를 is_ended/open_at/close_at 조건으로, 모르는 값이면 None"""
+        if status == "ended":
+            return Q(is_ended=True) | Q(close_at__lt=Now())
+        not_ended = Q(is_ended=False) & (
+            Q(close_at__isnull=True) | Q(close_at__gte=Now())
+        )
+        if status == "open":
+            return not_ended & Q(open_at__lte=Now())
+        if status == "before":
+            return not_ended & Q(open_at__gt=Now())
+        return None
+
+    def filter_status(self, status):
+        """상태로 필터, (community, is_ended, close_at) 인덱스를 쓸 수 있는 조건"""
+        condition = self.status_q(status)
+        if condition is None:
+            return self
+        return self.filter(condition)
+
+
 class GroupPurchase(models.Model, HitCountMixin):
     """공동구매 게시글 모델"""
 
@@ -138,6 +227,10 @@ class GroupPurchase(models.Model, HitCountMixin):
     person_limit = models.PositiveIntegerField(
         default=0, help_text="공구 제한 인원, 자기자신을 빼고 입력"
     )
+    joined_count = models.PositiveIntegerField(default=0, help_text="현재 참여 인원")
+    reserved_quantity = models.PositiveIntegerField(
+        default=0, help_text="참여 유저 신청 수량 합"
+    )
 
     location = models.CharField(max_length=100, help_text="만날 위치")
     # map_data = models.ForeignKey("GroupPurchaseMapData", on_delete=models.CASCADE, help_text="만날 위치")
@@ -165,35 +258,50 @@ class GroupPurchase(models.Model, HitCountMixin):
     # 조회수 코드
     view_count = models.PositiveIntegerField(default=0)
 
+    objects = GroupPurchaseQuerySet.as_manager()
+
     def get_end_option_display(self, obj):
         return dict(self.END_CHOICES).get(self.end_option)
 
     def click(self):
-        self.view_count += 1
-        self.save()
+        """조회수 버퍼에 기록, feed.tasks.flush_view_counts_job 이 DB에 반영"""
+        record_view(self)
 
     class Meta:
         verbose_name = "공구 게시글(GroupPurchase)"
         verbose_name_plural = "공구 게시글(GroupPurchase)"
+        indexes = [
+            models.Index(fields=["community", "-created_at", "-id"]),
+            # 상태 필터/마감 임박순 정렬
+            models.Index(fields=["community", "is_ended", "close_at"]),
+            # 마감 sweep 용, 진행 중인 공구만
+            models.Index(
+                fields=["close_at"],
+                condition=Q(is_ended=False),
+                name="grouppurchase_open_close_at",
+            ),
+        ]
 
     def __str__(self):
         return f"만날 장소 : {str(self.location)} | 모집 인원 : {str(self.person_limit)}명 | 공구 물건 : {str(self.product_name)}"
 
-    def check_end_person_limit_point(self, grouppurchase_id):
-        """공구 제한 인원이 채워질 경우 공구 종료"""
-        joined = JoinedUser.objects.filter(
-            grouppurchase_id=grouppurchase_id, is_deleted=False
-        )
-        if not joined:
-            return False
-        else:
-            person_count = self.person_limit - joined.count()
-            if person_count <= 0:
-                self.is_ended = True
-                self.save()
-                return True
-            else:
-                return False
+    def get_status(self):
+        """with_status() 와 같은 기준의 상태, annotation 없이 가져온 객체용"""
+        now = timezone.now()
+        if self.is_ended or (self.close_at and self.close_at < now):
+            return GroupPurchaseQuerySet.STATUS_ENDED
+        if self.open_at > now:
+            return GroupPurchaseQuerySet.STATUS_BEFORE
+        return GroupPurchaseQuerySet.STATUS_OPEN
+
+    @property
+    def is_full(self):
+        """공구 제한 인원이 모두 찼는지, 참여 인원은 feed.reservations.reserve 로 반영"""
+        return self.joined_count >= self.person_limit
+
+    @property
+    def remain_quantity(self):
+        return max(self.product_number - self.reserved_quantity, 0)
 
 
 class GroupPurchaseComment(CommentBaseModel):
@@ -249,3 +357,37 @@ class Image(models.Model):
             new_name = change_image_name(self, self.image.name)
             self.image.name = new_name
         super(Image, self).save(*args, **kwargs)
+
+
+class ImageReference(models.Model):
+    """
+    본문에서 쓰고 있는 media/feed 이미지 파일 이름 -> 게시글
+    feed.images.sync_image_references 로 저장시 갱신, 게시글이 삭제되면 같이 삭제
+    """
+
+    name = models.CharField(max_length=100)
+    feed = models.ForeignKey(
+        Feed, on_delete=models.CASCADE, null=True, related_name="image_references"
+    )
+    grouppurchase = models.ForeignKey(
+        GroupPurchase,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="image_references",
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["name"])]
+
+
+class ViewCountFlush(models.Model):
+    """
+    DB 에 반영한 조회수 flush 표시, 조회수와 같은 transaction 에 저장
+    flush 가 commit 후 ack 전에 죽어도 다음 flush 가 같은 값을 다시 더하지 않게
+    """
+
+    marker = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+feed_search_index = FullTextIndex(Feed, ("title", "content"), html_fields=("content",))
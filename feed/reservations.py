@@ -0,0 +1,36 @@
+"""공구 참여 수량/인원 예약
+
+GroupPurchase 에 저장된 reserved_quantity(신청 수량 합), joined_count(참여 인원)를
+조건부 UPDATE 한 번으로 바꾼다. 남은 수량/인원이 부족하거나 이미 종료된 공구면 아무것도
+바뀌지 않고, 인원이 차면 같은 UPDATE 에서 is_ended 로 마감한다.
+참여 view 는 해당 공구 row 만 select_for_update 로 잠그므로 같은 공구의 요청만 순서대로
+처리되고 다른 공구 참여는 막지 않는다.
+"""
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+
+from feed.models import GroupPurchase
+
+
+def reserve(grouppurchase_id, quantity=0, persons=0):
+    """
+    수량 quantity, 인원 persons 만큼 예약(음수면 반납), 반영됐으면 True
+    늘어나는 쪽만 조건을 검사하므로 취소/수량 감소는 항상 반영된다
+    """
+    queryset = GroupPurchase.objects.filter(id=grouppurchase_id, is_ended=False)
+    if quantity > 0:
+        queryset = queryset.filter(
+            product_number__gte=F("reserved_quantity") + quantity
+        )
+    if persons > 0:
+        queryset = queryset.filter(person_limit__gte=F("joined_count") + persons)
+    updated = queryset.update(
+        # SET 의 F() 는 UPDATE 이전 값이라 마감 조건은 바뀐 인원으로 계산
+        is_ended=Case(
+            When(person_limit__lte=F("joined_count") + persons, then=Value(True)),
+            default=Value(False),
+        ),
+        reserved_quantity=Greatest(F("reserved_quantity") + quantity, 0),
+        joined_count=Greatest(F("joined_count") + persons, 0),
+    )
+    return updated == 1
@@ -1,9 +1,7 @@
 from datetime import datetime
-from pytz import timezone
 from rest_framework import serializers
 from decouple import config
 
-from community.models import Community
 from feed.models import (
     Category,
     Comment,
@@ -13,8 +11,23 @@ from feed.models import (
     JoinedUser,
     GroupPurchaseComment,
 )
+from feed.viewcount import get_pending_view_counts, get_view_count
 from user.models import Profile
-from django.db.models import Sum
+
+
+def get_list_view_count(serializer, obj):
+    """목록이면 페이지 전체의 미반영 조회수를 한 번에 가져와 context 에 둔다"""
+    counts = serializer.context.setdefault("view_count_map", {})
+    key = (obj._meta.label_lower, obj.pk)
+    if key not in counts:
+        parent = serializer.parent
+        if isinstance(parent, serializers.ListSerializer) and isinstance(
+            parent.instance, list
+        ):
+            counts.update(get_pending_view_counts(parent.instance))
+        if key not in counts:
+            counts.update(get_pending_view_counts([obj]))
+    return obj.view_count + counts[key]
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -130,6 +143,7 @@ class FeedListSerializer(serializers.ModelSerializer):
     comments_count = serializers.SerializerMethodField()
     likes_count = serializers.SerializerMethodField()
     community_name = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Feed
@@ -150,34 +164,43 @@ class FeedListSerializer(serializers.ModelSerializer):
             "community_name",
         ]
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """list에 필요한 profile, category, community를 한 번에 가져오기"""
+        return queryset.select_related("user__profile", "category__community")
+
+    def get_profile(self, obj):
+        """요청 단위 profile map, eager loading 안 된 queryset도 user당 1번만 조회"""
+        profiles = self.context.setdefault("profile_map", {})
+        if obj.user_id not in profiles:
+            profiles[obj.user_id] = obj.user.profile
+        return profiles[obj.user_id]
+
     def get_nickname(self, obj):
-        return Profile.objects.get(user=obj.user).nickname
+        return self.get_profile(obj).nickname
 
     def get_profileimage(self, obj):
-        return str(Profile.objects.get(user=obj.user).profileimage)
+        return str(self.get_profile(obj).profileimage)
 
     def get_profileimageurl(self, obj):
         return (
-            config("BACKEND_URL")
-            + "/media/"
-            + str(Profile.objects.get(user=obj.user).profileimage)
+            config("BACKEND_URL") + "/media/" + str(self.get_profile(obj).profileimage)
         )
 
     def get_category(self, obj):
-        return Category.objects.get(id=obj.category_id).category_name
+        return obj.category.category_name
 
     def get_comments_count(self, obj):
-        comment = obj.comment.count()
-        cocomment = Cocomment.objects.filter(comment__feed=obj).count()
-        return comment + cocomment
+        return obj.comment_count
 
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.like_count
 
     def get_community_name(self, obj):
-        category = Category.objects.get(id=obj.category_id)
-        communityurl = Community.objects.get(title=category.community).communityurl
-        return communityurl
+        return obj.category.community.communityurl
+
+    def get_view_count(self, obj):
+        return get_list_view_count(self, obj)
 
 
 class FeedCreateSerializer(serializers.ModelSerializer):
@@ -205,6 +228,7 @@ class FeedDetailSerializer(serializers.ModelSerializer):
     category_url = serializers.SerializerMethodField()
     like_bool = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Feed
@@ -222,7 +246,7 @@ class FeedDetailSerializer(serializers.ModelSerializer):
         }
 
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.like_count
 
     def get_nickname(self, obj):
         return Profile.objects.get(user=obj.user).nickname
@@ -241,9 +265,10 @@ class FeedDetailSerializer(serializers.ModelSerializer):
             return False
 
     def get_comments_count(self, obj):
-        comment = obj.comment.count()
-        cocomment = Cocomment.objects.filter(comment__feed=obj).count()
-        return comment + cocomment
+        return obj.comment_count
+
+    def get_view_count(self, obj):
+        return get_view_count(obj)
 
 
 class ProfileFeedSerializer(serializers.ModelSerializer):
@@ -265,15 +290,13 @@ class ProfileFeedSerializer(serializers.ModelSerializer):
         }
 
     def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.like_count
 
     def get_nickname(self, obj):
-        return Profile.objects.get(user=obj.user).nickname
+        return obj.user.profile.nickname
 
     def get_comments_count(self, obj):
-        comment = obj.comment.count()
-        cocomment = Cocomment.objects.filter(comment__feed=obj).count()
-        return comment + cocomment
+        return obj.comment_count
 
 
 class FeedNotificationSerializer(serializers.ModelSerializer):
@@ -300,6 +323,7 @@ class GroupPurchaseListSerializer(serializers.ModelSerializer):
     nickname = serializers.SerializerMethodField()
     joined_user_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
 
     class Meta:
         model = GroupPurchase
@@ -326,37 +350,17 @@ class GroupPurchaseListSerializer(serializers.ModelSerializer):
         return Profile.objects.get(user=obj.user).nickname
 
     def get_joined_user_count(self, obj):
-        real_join = JoinedUser.objects.filter(
-            grouppurchase_id=obj.id, is_deleted=False
-        ).count()
-        return real_join
+        return obj.joined_count
 
     def get_comments_count(self, obj):
         return obj.p_comment.count()
 
+    def get_view_count(self, obj):
+        return get_list_view_count(self, obj)
+
     def get_grouppurchase_status(self, obj):
-        """공구 게시글 상태 check"""
-        now = datetime.now(timezone("Asia/Seoul"))
-        is_ended = obj.is_ended
-        open_at = datetime.strptime(str(obj.open_at), "%Y-%m-%d %H:%M:%S%z")
-        if not obj.close_at:
-            if is_ended:
-                return "종료"
-            elif not is_ended and open_at > now:
-                return "시작 전"
-            elif not is_ended and open_at < now:
-                return "진행 중"
-        else:
-            close_at = datetime.strptime(str(obj.open_at), "%Y-%m-%d %H:%M:%S%z")
-            if is_ended:
-                return "종료"
-            elif close_at < now:
-                # cron 작동 안했을 경우에도 종료 시간에따라 종료를 띄워주기
-                return "종료"
-            elif not is_ended and open_at > now:
-                return "시작 전"
-            elif close_at and not is_ended and close_at > now and open_at < now:
-                return "진행 중"
+        """공구 게시글 상태, 목록/상세 view 는 with_status() annotation 을 쓴다"""
+        return getattr(obj, "grouppurchase_status", None) or obj.get_status()
 
 
 class GroupPurchaseDetailSerializer(serializers.ModelSerializer):
@@ -370,34 +374,15 @@ class GroupPurchaseDetailSerializer(serializers.ModelSerializer):
     end_choice = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
     category_url = serializers.SerializerMethodField()
+    view_count = serializers.SerializerMethodField()
 
     class Meta:
         model = GroupPurchase
         fields = "__all__"
 
     def get_grouppurchase_status(self, obj):
-        """공구 게시글 상태 check"""
-        now = datetime.now(timezone("Asia/Seoul"))
-        is_ended = obj.is_ended
-        open_at = datetime.strptime(str(obj.open_at), "%Y-%m-%d %H:%M:%S%z")
-        if not obj.close_at:
-            if is_ended:
-                return "종료"
-            elif not is_ended and open_at > now:
-                return "시작 전"
-            elif not is_ended and open_at < now:
-                return "진행 중"
-        else:
-            close_at = datetime.strptime(str(obj.close_at), "%Y-%m-%d %H:%M:%S%z")
-            if is_ended:
-                return "종료"
-            elif close_at < now:
-                # cron 작동 안했을 경우에도 종료 시간에따라 종료를 띄워주기
-                return "종료"
-            elif not is_ended and open_at > now:
-                return "시작 전"
-            elif close_at and not is_ended and close_at > now and open_at < now:
-                return "진행 중"
+        """공구 게시글 상태, 목록/상세 view 는 with_status() annotation 을 쓴다"""
+        return getattr(obj, "grouppurchase_status", None) or obj.get_status()
 
     def get_joined_users(self, obj):
         real_join = JoinedUser.objects.filter(grouppurchase_id=obj.id, is_deleted=False)
@@ -405,18 +390,10 @@ class GroupPurchaseDetailSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_joined_user_count(self, obj):
-        real_join = JoinedUser.objects.filter(
-            grouppurchase_id=obj.id, is_deleted=False
-        ).count()
-        return real_join
+        return obj.joined_count
 
     def get_purchase_quantity(self, obj):
-        return (
-            JoinedUser.objects.filter(grouppurchase_id=obj.id)
-            .aggregate(Sum("product_quantity"))
-            .get("product_quantity__sum")
-            or 0
-        )
+        return obj.reserved_quantity
 
     def get_comments_count(self, obj):
         return obj.p_comment.count()
@@ -430,6 +407,9 @@ class GroupPurchaseDetailSerializer(serializers.ModelSerializer):
     def get_category_url(self, obj):
         return obj.category.category_url
 
+    def get_view_count(self, obj):
+        return get_view_count(obj)
+
 
 class GroupPurchaseCreateSerializer(serializers.ModelSerializer):
     """공구 게시글 생성 serializer"""
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_migrate, post_save
+from django.dispatch import receiver
+
+from .images import sync_image_references
+from .models import Category, Feed, GroupPurchase
+from .tasks import schedule_close
+
+
+@receiver(post_save, sender=GroupPurchase)
+def schedule_grouppurchase_close(sender, instance, **kwargs):
+    """생성/수정시 commit 이후 close_at 마감 예약, 이전 예약은 실행돼도 아무것도 안 한다"""
+    if instance.is_ended or not instance.close_at:
+        return
+    grouppurchase_id, close_at = instance.id, instance.close_at
+    transaction.on_commit(lambda: schedule_close(grouppurchase_id, close_at))
+
+
+@receiver(post_save, sender=Feed)
+@receiver(post_save, sender=GroupPurchase)
+def update_image_references(sender, instance, **kwargs):
+    """본문 이미지 참조 인덱스 갱신, 게시글 삭제시에는 FK cascade 로 같이 삭제"""
+    sync_image_references(instance)
+
+
+@receiver(post_migrate)
+def backfill_feed_community(sender, **kwargs):
+    """community 가 비어있는 기존 게시글을 category 의 커뮤니티로 채우기"""
+    if sender.label != Feed._meta.app_label:
+        return
+    Feed.objects.filter(community__isnull=True).update(
+        community=Subquery(
+            Category.objects.filter(id=OuterRef("category_id")).values("community_id")
+        )
+    )
@@ -1,21 +1,128 @@
+import logging
+
 from celery import shared_task
-from .models import Feed, Image
-import re
-import os
-from django.core.files.storage import default_storage
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from alarm.models import Alarm
+from alarm.tasks import schedule_delivery
+from .images import collect_orphan_images
+from .models import GroupPurchase, JoinedUser
+from .viewcount import flush_view_counts
+
+logger = logging.getLogger(__name__)
+
+# 이 시간 안에 마감되는 공구만 ETA task 로 예약, 나머지는 sweep 이 가까워지면 예약
+# (broker 가 오래 들고 있는 ETA task 는 ack timeout 으로 재전달될 수 있어서)
+CLOSE_SCHEDULE_HORIZON = timezone.timedelta(minutes=15)
+CLOSE_SCHEDULED_KEY = "grouppurchase:close:{}:{}"
+CLOSE_MAX_RETRIES = 5
 
 
 @shared_task
 def image_delete_job():
-    feeds = Feed.objects.all()
-    used_image_url = []
-    all_images = os.listdir("media/feed")
-    for feed in feeds:
-        content = feed.content
-        image_tags = re.findall(r'<img.*?src="(.*?)".*?>', content)
-        for image_tag in image_tags:
-            image_name = image_tag.split("feed/")[1]
-            used_image_url.append(image_name)
-    for image in all_images:
-        if image not in used_image_url:
-            os.remove("media/feed/" + image)
+    """본문에서 쓰지 않는 media/feed 이미지 정리"""
+    report = collect_orphan_images()
+    logger.info("orphan images deleted: %s", report)
+
+
+@shared_task
+def flush_view_counts_job():
+    flush_view_counts()
+
+
+def close_grouppurchase(grouppurchase_id):
+    """
+    close_at 이 지난 진행 중 공구를 마감하고 참여 유저에게 알람, 마감했으면 True
+    이미 종료됐거나 close_at 이 미뤄진 공구는 건드리지 않으므로 여러 번 실행해도 된다
+    """
+    with transaction.atomic():
+        closed = GroupPurchase.objects.filter(
+            id=grouppurchase_id, is_ended=False, close_at__lte=timezone.now()
+        ).update(is_ended=True)
+        if not closed:
+            return False
+        title = GroupPurchase.objects.values_list("title", flat=True).get(
+            id=grouppurchase_id
+        )
+        user_ids = list(
+            JoinedUser.objects.filter(
+                grouppurchase_id=grouppurchase_id, is_deleted=False
+            )
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        Alarm.objects.bulk_create(
+            [
+                Alarm(
+                    user_id=user_id,
+                    message=f"참여한 공구 '{title}' 모집이 마감되었습니다!",
+                )
+                for user_id in user_ids
+            ]
+        )
+        # bulk_create 는 post_save 를 보내지 않으므로 전송 예약을 직접
+        transaction.on_commit(
+            lambda: [schedule_delivery(user_id) for user_id in user_ids]
+        )
+    return True
+
+
+@shared_task(bind=True, max_retries=CLOSE_MAX_RETRIES)
+def close_grouppurchase_job(self, grouppurchase_id):
+    """ETA 보다 일찍 실행되면(워커 시계 차이 등) close_at 까지 기다렸다가 다시 실행"""
+    if close_grouppurchase(grouppurchase_id):
+        return
+    close_at = (
+        GroupPurchase.objects.filter(id=grouppurchase_id, is_ended=False)
+        .values_list("close_at", flat=True)
+        .first()
+    )
+    # 먼 미래로 미뤄진 공구는 sweep 이 가까워지면 다시 예약
+    if close_at and close_at - timezone.now() <= CLOSE_SCHEDULE_HORIZON:
+        wait = (close_at - timezone.now()).total_seconds()
+        raise self.retry(countdown=max(wait, 0))
+
+
+def schedule_close(grouppurchase_id, close_at):
+    """
+    close_at 에 마감 task 예약, CLOSE_SCHEDULE_HORIZON 보다 먼 공구는 sweep 이 나중에 예약
+    broker 장애시에도 요청은 실패하지 않고 sweep 이 마감한다
+    """
+    if close_at - timezone.now() > CLOSE_SCHEDULE_HORIZON:
+        return
+    key = CLOSE_SCHEDULED_KEY.format(grouppurchase_id, close_at.timestamp())
+    if not cache.add(key, 1, CLOSE_SCHEDULE_HORIZON.total_seconds() * 2):
+        return
+    try:
+        close_grouppurchase_job.apply_async(
+            (grouppurchase_id,), eta=close_at, retry=False
+        )
+    except Exception:
+        cache.delete(key)
+        logger.exception("grouppurchase close scheduling failed: %s", grouppurchase_id)
+
+
+def sweep_grouppurchases():
+    """
+    마감 시간이 지났는데 열려 있는 공구 마감, 곧 마감될 공구는 예약, 마감한 수 반환
+    진행 중 공구 partial index 만 읽는다
+    """
+    now = timezone.now()
+    open_purchases = GroupPurchase.objects.filter(
+        is_ended=False, close_at__isnull=False
+    )
+    overdue = open_purchases.filter(close_at__lte=now).values_list("id", flat=True)
+    closed = sum(close_grouppurchase(grouppurchase_id) for grouppurchase_id in overdue)
+    upcoming = open_purchases.filter(
+        close_at__gt=now, close_at__lte=now + CLOSE_SCHEDULE_HORIZON
+    ).values_list("id", "close_at")
+    for grouppurchase_id, close_at in upcoming:
+        schedule_close(grouppurchase_id, close_at)
+    return closed
+
+
+@shared_task
+def sweep_grouppurchases_job():
+    sweep_grouppurchases()
@@ -1,4 +1,25 @@
+import base64
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock, skipUnless
+
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -12,7 +33,18 @@ from feed.models import (
     GroupPurchase,
     JoinedUser,
     GroupPurchaseComment,
+    ImageReference,
+    feed_search_index,
 )
+from feed.images import collect_orphan_images, rebuild_image_references
+from feed.tasks import (
+    close_grouppurchase,
+    close_grouppurchase_job,
+    sweep_grouppurchases,
+)
+from feed.viewcount import flush_view_counts, get_store
+from feed.views import LikeView
+from alarm.models import Alarm
 from community.models import Community, CommunityAdmin, ForbiddenWord
 
 
@@ -32,6 +64,9 @@ class FeedViewTest(APITestCase):
             kwargs={"community_url": "title1", "category_url": "talk"},
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_get_all_feed_list(self):
         """피드 전체 리스트 조회"""
         Feed.objects.create(
@@ -68,6 +103,144 @@ class FeedViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    def create_feeds(self, start, end):
+        for i in range(start, end):
+            user = User.objects.create_user(f"writer{i}@naver.com", f"writer{i}")
+            feed = Feed.objects.create(
+                user=user, category=self.category, title="title", content="content"
+            )
+            comment = Comment.objects.create(feed=feed, user=user, text="comment")
+            Cocomment.objects.create(comment=comment, user=user, text="cocomment")
+            feed.likes.add(self.user)
+        call_command("rebuild_counters", stdout=StringIO())
+
+    def test_get_feed_list_query_count(self):
+        """피드 리스트 조회시 게시글 수와 무관하게 쿼리 수 일정"""
+        self.create_feeds(0, 1)
+        with CaptureQueriesContext(connection) as one_feed:
+            self.client.get(path=self.path)
+        self.create_feeds(1, 4)
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_feeds:
+            response = self.client.get(path=self.path)
+        self.assertEqual(len(one_feed), len(many_feeds))
+        self.assertEqual(response.data["results"][0]["comments_count"], 2)
+        self.assertEqual(response.data["results"][0]["likes_count"], 1)
+
+    def test_get_feed_list_view_count_once(self):
+        """피드 리스트의 미반영 조회수는 페이지당 저장소 조회 1번"""
+        self.create_feeds(0, 4)
+        with mock.patch.object(
+            get_store(), "get_many", wraps=get_store().get_many
+        ) as get_many:
+            response = self.client.get(path=self.path)
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_get_feed_list_cursor_pages(self):
+        """커서로 다음/이전 페이지 이동시 중복, 누락 없이 최신순"""
+        self.create_feeds(0, 6)
+        expected = list(
+            Feed.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        first = self.client.get(self.path)
+        self.assertEqual(first.data["total_pages"], 2)
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        self.assertIsNone(second.data["next"])
+        ids = [feed["id"] for feed in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, expected)
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], first.data["results"])
+
+    def test_get_feed_list_invalid_cursor(self):
+        """만들 수 없는 커서는 500 이 아니라 404"""
+        self.create_feeds(0, 1)
+        for data in ([0, {"a": 1}, 1], [0, "2023-01-01T00:00:00", [1]], [0, "x", 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+            response = self.client.get(self.path, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.path, {"cursor": "not-base64"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_feed_list_community_index(self):
+        """커뮤니티 목록은 Feed.community 로 조회, 카테고리에서 자동으로 채움"""
+        feed = Feed.objects.create(
+            user=self.user, category=self.category, title="title1", content="content1"
+        )
+        self.assertEqual(feed.community_id, self.category.community_id)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(path=self.path)
+        feed_query = next(q["sql"] for q in queries if 'FROM "feed_feed"' in q["sql"])
+        self.assertIn('"feed_feed"."community_id" =', feed_query)
+
+
+class FeedSearchViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test1@naver.com", "test1", "test123!")
+        cls.community = Community.objects.create(
+            title="title1", communityurl="title1", introduction="introduction1"
+        )
+        cls.category = Category.objects.create(
+            community=cls.community, category_name="얘기해요", category_url="talk"
+        )
+        cls.feed1 = Feed.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="자취 요리",
+            content='<p>자취 요리 레시피</p><img src="http://a/media/feed/BFF_1.png">',
+        )
+        cls.feed2 = Feed.objects.create(
+            user=cls.user,
+            category=cls.category,
+            title="청소",
+            content="<p>자취 청소</p>",
+        )
+        cls.path = reverse("search_feed_view", kwargs={"community_url": "title1"})
+
+    def test_search_feed_ranked(self):
+        """검색어가 많이 포함된 게시글 먼저"""
+        response = self.client.get(self.path, {"search": "자취"})
+        ids = [feed["id"] for feed in response.data["results"]]
+        self.assertEqual(ids, [self.feed1.id, self.feed2.id])
+
+    def test_search_feed_ignore_html(self):
+        """html 태그는 검색되지 않음"""
+        response = self.client.get(self.path, {"search": "img"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_feed_update_index(self):
+        """게시글 수정/삭제가 검색 결과에 반영"""
+        self.feed2.title = "빨래"
+        self.feed2.content = "빨래"
+        self.feed2.save()
+        response = self.client.get(self.path, {"search": "청소"})
+        self.assertEqual(response.data["results"], [])
+
+        self.feed1.delete()
+        response = self.client.get(self.path, {"search": "자취"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_feed_cursor(self):
+        """커서로 다음 페이지 조회"""
+        response = self.client.get(self.path, {"search": "자취", "page_size": 1})
+        self.assertEqual(response.data["results"][0]["id"], self.feed1.id)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["id"], self.feed2.id)
+        self.assertIsNone(response.data["next"])
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL 전문 검색")
+    def test_search_feed_use_gin_index(self):
+        """PostgreSQL 검색 쿼리가 GIN 인덱스를 사용"""
+        sql, params = feed_search_index.search_sql("자취 요리", (1.0, 10), 11)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn(f"{feed_search_index.table}_gin", plan)
+
 
 class FeedDetailViewTest(APITestCase):
     @classmethod
@@ -122,6 +295,8 @@ class FeedDetailViewTest(APITestCase):
         cls.path5 = reverse("feed_notification_view", kwargs={"feed_id": 1})
 
     def setUp(self):
+        cache.clear()
+        get_store().clear()
         self.access_token = self.client.post(reverse("login"), self.user_data).data.get(
             "access"
         )
@@ -173,6 +348,28 @@ class FeedDetailViewTest(APITestCase):
         )
         self.assertEqual(response.data["feed"]["view_count"], 1)
 
+    def test_get_feed_detail_flush_view_count(self):
+        """상세 조회시 DB write 없이 쌓인 조회수를 flush로 반영"""
+        self.client.get(path=self.path)
+        self.client.get(path=self.path)
+        self.assertEqual(Feed.objects.get(id=1).view_count, 0)
+
+        flush_view_counts()
+        self.assertEqual(Feed.objects.get(id=1).view_count, 2)
+        response = self.client.get(path=self.path)
+        self.assertEqual(response.data["feed"]["view_count"], 3)
+
+    def test_flush_view_count_once(self):
+        """DB 반영 후 ack 전에 실패해도 다음 flush 가 같은 조회수를 다시 더하지 않음"""
+        self.client.get(path=self.path)
+        store = get_store()
+        with mock.patch.object(store, "ack"):
+            flush_view_counts()
+        self.assertEqual(Feed.objects.get(id=1).view_count, 1)
+        flush_view_counts()
+        flush_view_counts()
+        self.assertEqual(Feed.objects.get(id=1).view_count, 1)
+
     def test_put_feed_detail_if_not_logged_in(self):
         """피드 수정시 로그인 확인"""
         response = self.client.put(
@@ -302,6 +499,33 @@ class FeedDetailViewTest(APITestCase):
         )
         self.assertEqual(response.data, "좋아요를 취소했습니다.")
 
+    def test_post_feed_like_count(self):
+        """feed 좋아요/취소 시 좋아요 카운터 반영"""
+        self.client.post(
+            path=self.path4,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.assertEqual(Feed.objects.get(id=1).like_count, 1)
+
+        self.client.post(
+            path=self.path4,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.assertEqual(Feed.objects.get(id=1).like_count, 0)
+
+    def test_post_feed_like_count_overlap(self):
+        """겹친 요청이 둘 다 좋아요/취소를 해도 카운터는 실제 좋아요 수와 같음"""
+        feed = Feed.objects.get(id=1)
+        self.assertTrue(LikeView.like(feed, self.user))
+        self.assertFalse(LikeView.like(feed, self.user))
+        feed.refresh_from_db()
+        self.assertEqual(feed.like_count, feed.likes.count())
+
+        self.assertEqual(LikeView.unlike(feed, self.user), 1)
+        self.assertEqual(LikeView.unlike(feed, self.user), 0)
+        feed.refresh_from_db()
+        self.assertEqual(feed.like_count, feed.likes.count())
+
     def test_post_feed_notification_if_not_logged_in(self):
         """공지글 등록시 로그인 확인"""
         response = self.client.post(
@@ -845,6 +1069,7 @@ class GroupPurchaseViewTest(APITestCase):
         )
 
     def setUp(self):
+        get_store().clear()
         self.grouppurchase_data = {
             "community": self.community.id,
             "category": self.category.id,
@@ -1225,6 +1450,60 @@ class GroupPurchaseViewTest(APITestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    def test_get_grouppurchase_feed_list_page_size(self):
+        """공구 게시글 list 커서 페이지네이션"""
+        response = self.client.get(path=self.path4, data={"page_size": 1})
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertIsNotNone(response.data["next"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_get_grouppurchase_list_status(self):
+        """공구 상태 DB 계산, 상태 필터와 진행 중 먼저 마감 임박순 정렬"""
+        common = {
+            "community": self.community,
+            "category": self.category,
+            "user": self.user,
+            "product_name": "상품명",
+            "product_price": "10000",
+            "location": "서울시 송파구",
+            "meeting_at": "9999-06-30T12:00:00",
+            "open_at": "2023-06-20T18:00:00",
+            "end_option": "quit",
+        }
+        no_close = GroupPurchase.objects.create(title="no close", **common)
+        late = GroupPurchase.objects.create(
+            title="late", close_at="9999-06-29T09:00:00", **common
+        )
+        soon = GroupPurchase.objects.create(
+            title="soon", close_at="9999-06-01T09:00:00", **common
+        )
+        response = self.client.get(path=self.path4, data={"status": "open"})
+        titles = [feed["title"] for feed in response.data["data"]]
+        self.assertEqual(titles, ["soon", "late", "no close"])
+        self.assertEqual(response.data["data"][0]["grouppurchase_status"], "진행 중")
+
+        # 마감 정렬은 is_ended 컬럼 기준이므로 지난 공구는 마감 task 가 처리한 상태로
+        GroupPurchase.objects.filter(close_at__lt=timezone.now()).update(is_ended=True)
+        response = self.client.get(
+            path=self.path4, data={"ordering": "closing", "page_size": 2}
+        )
+        ids = [feed["id"] for feed in response.data["data"]]
+        response = self.client.get(response.data["next"])
+        ids += [feed["id"] for feed in response.data["data"]]
+        self.assertEqual(ids[:3], [soon.id, late.id, no_close.id])
+        self.assertEqual(response.data["data"][-1]["grouppurchase_status"], "종료")
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([feed["id"] for feed in response.data["data"]], ids[:2])
+
+    def test_get_grouppurchase_list_status_filter(self):
+        """상태 필터는 컬럼 조건, is_ended 가 아직 False 여도 close_at 이 지나면 종료"""
+        response = self.client.get(path=self.path4, data={"status": "ended"})
+        self.assertEqual(len(response.data["data"]), 4)
+        response = self.client.get(path=self.path4, data={"status": "before"})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
     def test_get_grouppurchase_feed_detail(self):
         """공구 게시글 상세 get, 로그인 없이"""
         response = self.client.get(
@@ -1340,6 +1619,60 @@ class GroupPurchaseViewTest(APITestCase):
         self.assertEqual(response2.data["message"], "공구 신청을 취소했습니다.")
         self.assertEqual(response2.status_code, 202)
 
+    def test_post_grouppurchase_join_count(self):
+        """공구 참여/취소 시 참여 인원 카운터 반영"""
+        self.client.post(
+            path=self.path6,
+            data=self.join_data,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token2}",
+        )
+        self.grouppurchase.refresh_from_db()
+        self.assertEqual(self.grouppurchase.joined_count, 1)
+
+        self.client.post(
+            path=self.path6,
+            data=self.join_data_0,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token2}",
+        )
+        self.grouppurchase.refresh_from_db()
+        self.assertEqual(self.grouppurchase.joined_count, 0)
+
+    def test_post_grouppurchase_join_over_quantity(self):
+        """공구 게시글 참여 실패, 남은 수량보다 많이 신청"""
+        response = self.client.post(
+            path=self.path6,
+            data={"product_quantity": 3},
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token2}",
+        )
+        self.assertEqual(response.status_code, 406)
+        self.grouppurchase.refresh_from_db()
+        self.assertEqual(self.grouppurchase.reserved_quantity, 0)
+        self.assertEqual(self.grouppurchase.joined_count, 0)
+
+    def test_post_grouppurchase_join_reserve_close(self):
+        """참여시 신청 수량 예약, 인원이 차면 같은 요청에서 마감"""
+        self.client.post(
+            path=self.path6,
+            data=self.join_data,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token2}",
+        )
+        response = self.client.post(
+            path=self.path6,
+            data=self.join_data_update,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.assertEqual(response.status_code, 406)
+
+        self.client.post(
+            path=self.path6,
+            data=self.join_data,
+            HTTP_AUTHORIZATION=f"Bearer {self.access_token}",
+        )
+        self.grouppurchase.refresh_from_db()
+        self.assertEqual(self.grouppurchase.reserved_quantity, 2)
+        self.assertEqual(self.grouppurchase.joined_count, 2)
+        self.assertTrue(self.grouppurchase.is_ended)
+
     def test_post_grouppurchase_re_join(self):
         """공구 게시글 참여 취소 후 재참여"""
         response = self.client.post(
@@ -1433,3 +1766,294 @@ class GroupPurchaseViewTest(APITestCase):
             HTTP_AUTHORIZATION=f"Bearer {self.access_token3}",
         )
         self.assertEqual(response.status_code, 403)
+
+
+@skipUnless(connection.vendor == "postgresql", "row lock 이 있는 PostgreSQL 에서만 의미가 있음")
+class GroupPurchaseJoinStressTest(TransactionTestCase):
+    """
+    공구 하나에 참여/수량 수정/취소 요청을 동시에 보내고 불변식 확인
+    SQLite 는 FOR UPDATE 가 없고 동시 write 가 table lock 에러가 되므로 PostgreSQL 에서만 실행
+    """
+
+    # 인원이 다 차면 이후 요청은 모두 거절되므로, 수량이 먼저 차고 취소가 잦게 해서
+    # 참여/수정/취소/재신청이 계속 섞이게 한다
+    users_count = 20
+    requests_count = 300
+    workers = 16
+    person_limit = 10
+    product_number = 12
+
+    def setUp(self):
+        cache.clear()
+        for i in range(self.users_count):
+            User.objects.create_user(f"stress{i}@test.com", f"stress{i}", "test12!@")
+        Profile.objects.update(region="seoul")
+        # force_authenticate 는 넘긴 객체를 그대로 쓰므로 바뀐 profile 로 다시 조회
+        self.users = list(User.objects.select_related("profile").order_by("id"))
+        community = Community.objects.create(
+            title="stress", communityurl="stress", introduction="stress"
+        )
+        category = Category.objects.create(
+            community=community, category_name="공구해요", category_url="groupbuy"
+        )
+        self.grouppurchase = GroupPurchase.objects.create(
+            community=community,
+            category=category,
+            user=self.users[0],
+            title="stress",
+            product_name="상품명",
+            product_number=self.product_number,
+            product_price=10000,
+            person_limit=self.person_limit,
+            location="서울시 송파구",
+            meeting_at="9999-06-30T12:00:00",
+            open_at="2023-06-20T18:00:00",
+            end_option="quit",
+        )
+        self.path = reverse(
+            "grouppurchase_join_view",
+            args=[community.communityurl, self.grouppurchase.id],
+        )
+        self.lock = threading.Lock()
+        self.lock_wait = []
+
+    def time_lock(self, execute, sql, params, many, context):
+        """공구 row 잠금(SELECT ... FOR UPDATE) 대기 시간 기록"""
+        if "FOR UPDATE" not in sql:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.lock_wait.append(time.perf_counter() - started)
+
+    def send(self, user, quantity):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            with connection.execute_wrapper(self.time_lock):
+                return client.post(self.path, {"product_quantity": quantity})
+        finally:
+            connection.close()
+
+    def test_concurrent_join_invariants(self):
+        """동시 요청 후 수량/인원 제한, 카운터, 마감 상태가 일관적"""
+        rng = random.Random(0)
+        jobs = [
+            (rng.choice(self.users), rng.choice([0, 0, 1, 2, 3]))
+            for _ in range(self.requests_count)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            responses = list(executor.map(lambda job: self.send(*job), jobs))
+        elapsed = time.perf_counter() - started
+
+        self.assertFalse([r for r in responses if r.status_code >= 500])
+        # 거절만 되고 끝나면 아무것도 검증하지 못하므로 참여/수정/취소가 실제로 일어났는지
+        succeeded = Counter(
+            r.data["message"] for r in responses if status.is_success(r.status_code)
+        )
+        self.assertGreater(succeeded["공구를 신청했습니다."] + succeeded["공구를 재 신청했습니다."], 0)
+        self.assertGreater(succeeded["공구 수량을 수정했습니다."], 0)
+        self.assertGreater(succeeded["공구 신청을 취소했습니다."], 0)
+        self.grouppurchase.refresh_from_db()
+        active = JoinedUser.objects.filter(
+            grouppurchase=self.grouppurchase, is_deleted=False
+        )
+        quantity = active.aggregate(Sum("product_quantity"))["product_quantity__sum"]
+        quantity = quantity or 0
+        self.assertLessEqual(quantity, self.product_number)
+        self.assertLessEqual(active.count(), self.person_limit)
+        self.assertEqual(self.grouppurchase.reserved_quantity, quantity)
+        self.assertEqual(self.grouppurchase.joined_count, active.count())
+        self.assertEqual(
+            self.grouppurchase.is_ended, active.count() >= self.person_limit
+        )
+        joined_users = JoinedUser.objects.filter(grouppurchase=self.grouppurchase)
+        self.assertEqual(
+            joined_users.count(), joined_users.values("user").distinct().count()
+        )
+
+        lock_wait = sorted(self.lock_wait)
+        sys.stderr.write(
+            f"\n[join stress] {len(jobs)} requests {len(jobs) / elapsed:.1f} req/s, "
+            f"{dict(succeeded)}, lock wait "
+            f"p50 {lock_wait[len(lock_wait) // 2] * 1000:.2f}ms "
+            f"max {lock_wait[-1] * 1000:.2f}ms\n"
+        )
+
+
+class GroupPurchaseCloseTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test01@test.com", "test01", "test12!@")
+        cls.user2 = User.objects.create_user("test02@test.com", "test02", "test12!@")
+        cls.community = Community.objects.create(
+            title="community1", communityurl="community1", introduction="introduction1"
+        )
+        cls.category = Category.objects.create(
+            community=cls.community, category_name="공구해요", category_url="groupbuy"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_grouppurchase(self, close_at):
+        return GroupPurchase.objects.create(
+            community=self.community,
+            category=self.category,
+            user=self.user,
+            title="purchase",
+            product_name="상품명",
+            product_price=10000,
+            location="서울시 송파구",
+            meeting_at=timezone.now() + timezone.timedelta(days=2),
+            open_at=timezone.now() - timezone.timedelta(days=1),
+            close_at=close_at,
+            end_option="quit",
+        )
+
+    def test_close_grouppurchase(self):
+        """close_at 이 지난 공구만 한 번 마감, 참여 중인 유저에게 알람"""
+        purchase = self.create_grouppurchase(
+            timezone.now() - timezone.timedelta(seconds=1)
+        )
+        JoinedUser.objects.create(
+            grouppurchase=purchase, user=self.user, product_quantity=1
+        )
+        JoinedUser.objects.create(
+            grouppurchase=purchase, user=self.user2, product_quantity=0, is_deleted=True
+        )
+        self.assertTrue(close_grouppurchase(purchase.id))
+        self.assertFalse(close_grouppurchase(purchase.id))
+        purchase.refresh_from_db()
+        self.assertTrue(purchase.is_ended)
+        self.assertEqual(
+            list(Alarm.objects.values_list("user_id", flat=True)), [self.user.id]
+        )
+
+        later = self.create_grouppurchase(timezone.now() + timezone.timedelta(hours=1))
+        self.assertFalse(close_grouppurchase(later.id))
+
+    def test_schedule_close_on_save(self):
+        """곧 마감될 공구만 저장시 close_at ETA 로 예약"""
+        close_at = timezone.now() + timezone.timedelta(minutes=5)
+        with mock.patch.object(close_grouppurchase_job, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                purchase = self.create_grouppurchase(close_at)
+                self.create_grouppurchase(timezone.now() + timezone.timedelta(days=3))
+        apply_async.assert_called_once_with((purchase.id,), eta=close_at, retry=False)
+
+    @mock.patch.object(close_grouppurchase_job, "retry", side_effect=Retry)
+    def test_close_grouppurchase_job_early(self, retry):
+        """ETA 보다 일찍 실행되면 close_at 까지 기다렸다가 retry"""
+        close_at = timezone.now() + timezone.timedelta(seconds=30)
+        purchase = self.create_grouppurchase(close_at)
+        with self.assertRaises(Retry):
+            close_grouppurchase_job(purchase.id)
+        self.assertAlmostEqual(retry.call_args.kwargs["countdown"], 30, delta=2)
+        purchase.refresh_from_db()
+        self.assertFalse(purchase.is_ended)
+
+        later = self.create_grouppurchase(timezone.now() + timezone.timedelta(days=3))
+        close_grouppurchase_job(later.id)
+        self.assertEqual(retry.call_count, 1)
+
+    def test_sweep_grouppurchases(self):
+        """예약이 누락된 공구 sweep 으로 마감"""
+        with mock.patch.object(close_grouppurchase_job, "apply_async"):
+            self.create_grouppurchase(timezone.now() - timezone.timedelta(minutes=1))
+            self.create_grouppurchase(None)
+            self.assertEqual(sweep_grouppurchases(), 1)
+        self.assertEqual(GroupPurchase.objects.filter(is_ended=True).count(), 1)
+
+
+class FeedImageCollectTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("test01@test.com", "test01", "test12!@")
+        community = Community.objects.create(
+            title="community1", communityurl="community1", introduction="introduction1"
+        )
+        cls.category = Category.objects.create(
+            community=community, category_name="얘기해요", category_url="talk"
+        )
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = os.path.join(media_root.name, "feed")
+        os.makedirs(self.directory)
+
+    def create_image(self, name, age_hours):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(b"image")
+        mtime = time.time() - age_hours * 3600
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_image_references_on_save(self):
+        """게시글 저장시 본문 이미지 참조 인덱스 갱신"""
+        feed = Feed.objects.create(
+            user=self.user,
+            category=self.category,
+            title="title",
+            content='<img src="http://a/media/feed/BFF_a.png">',
+        )
+        feed.content = '<img src="http://a/media/feed/BFF_b.png"><p>b</p>'
+        feed.save()
+        names = ImageReference.objects.values_list("name", flat=True)
+        self.assertEqual(list(names), ["BFF_b.png"])
+        self.assertEqual(rebuild_image_references(), 0)
+        ImageReference.objects.all().delete()
+        self.assertEqual(rebuild_image_references(), 1)
+        self.assertEqual(list(names), ["BFF_b.png"])
+        feed.delete()
+        self.assertFalse(ImageReference.objects.exists())
+
+    def test_collect_orphan_images(self):
+        """참조 없고 유예 시간이 지난 이미지만 삭제, dry-run 은 목록만"""
+        Feed.objects.create(
+            user=self.user,
+            category=self.category,
+            title="title",
+            content='<img src="http://a/media/feed/BFF_used.png">',
+        )
+        used = self.create_image("BFF_used.png", 48)
+        orphan = self.create_image("BFF_orphan.png", 48)
+        fresh = self.create_image("BFF_fresh.png", 1)
+
+        report = collect_orphan_images(dry_run=True, batch_size=2)
+        self.assertEqual(report["scanned"], 2)
+        self.assertEqual(report["names"], ["BFF_orphan.png"])
+        self.assertTrue(os.path.exists(orphan))
+
+        report = collect_orphan_images(batch_size=2)
+        self.assertEqual(report["deleted"], 1)
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(used))
+        self.assertTrue(os.path.exists(fresh))
+
+    def test_collect_orphan_images_empty_index(self):
+        """인덱스를 채운 적이 없으면(배포 직후) 먼저 기존 게시글로 채우고 정리"""
+        Feed.objects.create(
+            user=self.user,
+            category=self.category,
+            title="title",
+            content='<img src="http://a/media/feed/BFF_used.png">',
+        )
+        ImageReference.objects.all().delete()
+        used = self.create_image("BFF_used.png", 48)
+        orphan = self.create_image("BFF_orphan.png", 48)
+
+        report = collect_orphan_images()
+        self.assertEqual(report["deleted"], 1)
+        self.assertTrue(os.path.exists(used))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(ImageReference.objects.filter(name="BFF_used.png").exists())
@@ -0,0 +1,185 @@
+"""조회수 버퍼
+
+상세 조회마다 row 전체를 save 하지 않고 조회수를 저장소(Redis, 테스트는 프로세스 메모리)에
+모아두었다가 주기적으로 F() update 로 한 번에 반영한다.
+"""
+import threading
+from collections import defaultdict
+from uuid import uuid4
+
+import redis
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+KEY_PREFIX = "viewcount:"
+FLUSH_BATCH_SIZE = 500
+MODEL_LABELS = ("feed.feed", "feed.grouppurchase")
+# flush 하나가 lock 을 잡고 있을 수 있는 최대 시간
+LOCK_TIMEOUT = 300
+MARKER_RETENTION = timezone.timedelta(days=1)
+
+
+class LocalViewCountStore:
+    """Redis가 없는 로컬/테스트 환경용 저장소"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(lambda: defaultdict(int))
+        # label -> (marker, counts)
+        self.flushing = {}
+
+    def incr(self, label, pk):
+        with self.lock:
+            self.pending[label][pk] += 1
+
+    def get_many(self, label, pks):
+        with self.lock:
+            pending = self.pending[label]
+            _, flushing = self.flushing.get(label, (None, {}))
+            return {pk: pending.get(pk, 0) + flushing.get(pk, 0) for pk in pks}
+
+    def take(self, label):
+        with self.lock:
+            if label not in self.flushing:
+                counts = dict(self.pending.pop(label, {}))
+                if not counts:
+                    return None, {}
+                self.flushing[label] = (uuid4().hex, counts)
+            marker, counts = self.flushing[label]
+            return marker, dict(counts)
+
+    def ack(self, label, marker):
+        with self.lock:
+            if self.flushing.get(label, (None,))[0] == marker:
+                del self.flushing[label]
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.flushing.clear()
+
+
+class RedisViewCountStore:
+    """
+    모델별 hash 에 HINCRBY, flush 시 lock 을 잡고 hash 를 rename 해서 원자적으로 가져오기
+    가져간 hash 에는 marker 를 붙여서 DB 반영 여부를 marker 로 확인한다
+    """
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def keys(self, label):
+        key = KEY_PREFIX + label
+        return key, key + ":flushing", key + ":marker", key + ":lock"
+
+    def incr(self, label, pk):
+        key, *_ = self.keys(label)
+        self.client.hincrby(key, pk, 1)
+
+    def get_many(self, label, pks):
+        if not pks:
+            return {}
+        key, flushing, *_ = self.keys(label)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(key, pks)
+        pipe.hmget(flushing, pks)
+        pending, flushed = pipe.execute()
+        return {
+            pk: int(count or 0) + int(flushed_count or 0)
+            for pk, count, flushed_count in zip(pks, pending, flushed)
+        }
+
+    def take(self, label):
+        key, flushing, marker_key, lock = self.keys(label)
+        # 다른 flush 가 가져간 값은 그 flush 가 ack 하거나 lock 이 만료될 때까지 두기
+        if not self.client.set(lock, 1, nx=True, ex=LOCK_TIMEOUT):
+            return None, {}
+        # 이전 flush 가 실패해서 남은 값이 있으면 같은 marker 로 다시 반영
+        if not self.client.exists(flushing):
+            if not self.client.exists(key):
+                self.client.delete(lock)
+                return None, {}
+            pipe = self.client.pipeline()
+            pipe.rename(key, flushing)
+            pipe.set(marker_key, uuid4().hex)
+            pipe.execute()
+        self.client.set(marker_key, uuid4().hex, nx=True)
+        marker = self.client.get(marker_key).decode()
+        counts = self.client.hgetall(flushing)
+        return marker, {int(pk): int(count) for pk, count in counts.items()}
+
+    def ack(self, label, marker):
+        _, flushing, marker_key, lock = self.keys(label)
+        self.client.delete(flushing, marker_key, lock)
+
+    def clear(self):
+        for label in MODEL_LABELS:
+            self.client.delete(*self.keys(label))
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if settings.REDIS_URL:
+            _store = RedisViewCountStore(settings.REDIS_URL)
+        else:
+            _store = LocalViewCountStore()
+    return _store
+
+
+def record_view(instance):
+    """조회수 +1 (DB write 없음)"""
+    get_store().incr(instance._meta.label_lower, instance.pk)
+
+
+def get_view_count(instance):
+    """DB 조회수 + 아직 반영되지 않은 조회수"""
+    label = instance._meta.label_lower
+    return instance.view_count + get_store().get_many(label, [instance.pk])[instance.pk]
+
+
+def get_pending_view_counts(instances):
+    """아직 반영되지 않은 조회수 {(label, pk): 조회수}, 모델마다 저장소 조회 1번"""
+    pks = defaultdict(list)
+    for instance in instances:
+        pks[instance._meta.label_lower].append(instance.pk)
+    counts = {}
+    for label, label_pks in pks.items():
+        for pk, count in get_store().get_many(label, label_pks).items():
+            counts[label, pk] = count
+    return counts
+
+
+def flush_view_counts():
+    """
+    쌓인 조회수를 같은 증가량끼리 묶어서 F() update, 반영한 row 수 반환
+    가져온 값의 marker 를 같은 transaction 에 저장해서 같은 값은 한 번만 반영
+    """
+    store = get_store()
+    flushes = apps.get_model("feed.ViewCountFlush").objects
+    updated = 0
+    for label in MODEL_LABELS:
+        model = apps.get_model(label)
+        marker, counts = store.take(label)
+        if not counts:
+            continue
+        by_delta = defaultdict(list)
+        for pk, delta in counts.items():
+            by_delta[delta].append(pk)
+        with transaction.atomic():
+            _, created = flushes.get_or_create(marker=f"{label}:{marker}")
+            if created:
+                for delta, pks in by_delta.items():
+                    for i in range(0, len(pks), FLUSH_BATCH_SIZE):
+                        updated += model.objects.filter(
+                            pk__in=pks[i : i + FLUSH_BATCH_SIZE]
+                        ).update(view_count=F("view_count") + delta)
+        store.ack(label, marker)
+    flushes.filter(created_at__lt=timezone.now() - MARKER_RETENTION).delete()
+    return updated
@@ -1,18 +1,18 @@
-from rest_framework import filters, permissions, status
+from rest_framework import permissions, status
 from rest_framework.generics import get_object_or_404, ListAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Prefetch
-from rest_framework.pagination import PageNumberPagination
-from community.models import Community, CommunityAdmin, ForbiddenWord
+from community.models import Community
+from community.moderation import find_forbidden_words
+from community.roles import is_community_staff
 from community.serializers import (
     CommunityUrlSerializer,
     CommunityAdminSerializer,
     CommunityCreateSerializer,
     CommunityCategorySerializer,
 )
-from django.db.models import Sum
 from decouple import config
 from collections import OrderedDict
 from feed.models import (
@@ -24,7 +24,10 @@ from feed.models import (
     JoinedUser,
     Category,
     Image,
+    increase_count,
+    feed_search_index,
 )
+from feed.reservations import reserve
 from feed.serializers import (
     CommentCreateSerializer,
     CommentSerializer,
@@ -42,43 +45,23 @@ from feed.serializers import (
     GroupPurchaseCommentSerializer,
     GroupPurchaseSelfEndSerializer,
 )
-import math
 from alarm.models import Alarm
+from BFFs.pagination import KeysetPagination
+from BFFs.search import FullTextSearchPagination
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 4
-    page_size_query_param = "page_size"
+class GroupPurchasePagination(KeysetPagination):
+    page_size = 12
 
-    def get_paginated_response(self, data):
-        response = super().get_paginated_response(data)
-        response.data["total_pages"] = math.ceil(
-            self.page.paginator.count / self.page_size
-        )
-        response.data["before_page"] = (
-            None if self.page.number == 1 else self.page.number - 1
-        )
-        response.data["re_before_page"] = (
-            None if self.page.number < 2 else self.page.number - 2
-        )
-        response.data["current_page"] = self.page.number
-        response.data["after_page"] = (
-            None
-            if self.page.number >= self.page.paginator.num_pages
-            else self.page.number + 1
-        )
-        response.data["re_after_page"] = (
-            None
-            if self.page.number >= self.page.paginator.num_pages - 1
-            else self.page.number + 2
-        )
-        url = config("BACKEND_URL")
-        response.data["url"] = (
-            url
-            + "/community"
-            + self.request.build_absolute_uri().split("?")[0].split("community")[1]
-        )
-        return response
+
+class GroupPurchaseClosingPagination(GroupPurchasePagination):
+    """
+    종료 안 된 공구 먼저 마감 임박순, 마감 시간 없는 공구는 뒤
+    시간에 따라 바뀌는 상태 대신 저장된 컬럼으로 정렬해서 커서가 밀리지 않는다
+    """
+
+    ordering = ("is_ended", "close_at", "id")
+    nullable = ("close_at",)
 
 
 class CommentView(APIView):
@@ -88,19 +71,18 @@ class CommentView(APIView):
 
     def post(self, request, feed_id):
         serializer = CommentCreateSerializer(data=request.data)
-        forbidden_word = ForbiddenWord.objects.filter(
-            community__community_category__feed_category__id=feed_id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["text"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        feed = get_object_or_404(Feed.objects.select_related("category"), id=feed_id)
+        words = find_forbidden_words(
+            feed.category.community_id, request.data.get("text")
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
             serializer.save(user=request.user, feed_id=feed_id)
-            feed = get_object_or_404(Feed, id=feed_id)
+            increase_count(Feed.objects.filter(id=feed_id), "comment_count")
             Alarm.objects.create(
                 user=feed.user,
                 feed=feed,
@@ -116,23 +98,23 @@ class CommentView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, comment_id):
-        comment = get_object_or_404(Comment, id=comment_id)
+        comment = get_object_or_404(
+            Comment.objects.select_related("feed__category"), id=comment_id
+        )
         if comment.user != request.user:
             return Response(
                 {"error": "댓글 작성자만 수정할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN
             )
         else:
             serializer = CommentCreateSerializer(comment, data=request.data)
-            forbidden_word = ForbiddenWord.objects.filter(
-                community__community_category__feed_category__comment__id=comment_id
-            ).values_list("word", flat=True)
-            if forbidden_word:
-                for word in forbidden_word:
-                    if word in request.data["text"]:
-                        return Response(
-                            {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
+            words = find_forbidden_words(
+                comment.feed.category.community_id, request.data.get("text")
+            )
+            if words:
+                return Response(
+                    {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             if serializer.is_valid():
                 serializer.save()
                 return Response({"message": "댓글을 수정했습니다."}, status=status.HTTP_200_OK)
@@ -146,7 +128,11 @@ class CommentView(APIView):
                 {"error": "댓글 작성자만 삭제할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN
             )
         else:
-            comment.delete()
+            # 대댓글도 함께 삭제되므로 삭제된 row 수만큼 차감
+            deleted, _ = comment.delete()
+            increase_count(
+                Feed.objects.filter(id=comment.feed_id), "comment_count", -deleted
+            )
             return Response({"message": "댓글을 삭제했습니다."}, status=status.HTTP_200_OK)
 
 
@@ -170,19 +156,20 @@ class CocommentView(APIView):
 
     def post(self, request, comment_id):
         serializer = CocommentSerializer(data=request.data)
-        forbidden_word = ForbiddenWord.objects.filter(
-            community__community_category__feed_category__comment__id=comment_id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["text"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        comment = get_object_or_404(
+            Comment.objects.select_related("feed__category"), id=comment_id
+        )
+        words = find_forbidden_words(
+            comment.feed.category.community_id, request.data.get("text")
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
             serializer.save(user=request.user, comment_id=comment_id)
-            comment = get_object_or_404(Comment, id=comment_id)
+            increase_count(Feed.objects.filter(id=comment.feed_id), "comment_count")
             Alarm.objects.create(
                 user=request.user,
                 feed=comment.feed,
@@ -193,22 +180,23 @@ class CocommentView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, cocomment_id):
-        cocomment = get_object_or_404(Cocomment, id=cocomment_id)
+        cocomment = get_object_or_404(
+            Cocomment.objects.select_related("comment__feed__category"),
+            id=cocomment_id,
+        )
         if cocomment.user != request.user:
             return Response(
                 {"error": "대댓글 작성자만 수정할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN
             )
         else:
-            forbidden_word = ForbiddenWord.objects.filter(
-                community__community_category__feed_category__comment__cocomment__id=cocomment_id
-            ).values_list("word", flat=True)
-            if forbidden_word:
-                for word in forbidden_word:
-                    if word in request.data["text"]:
-                        return Response(
-                            {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
+            words = find_forbidden_words(
+                cocomment.comment.feed.category.community_id, request.data.get("text")
+            )
+            if words:
+                return Response(
+                    {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             serializer = CocommentSerializer(cocomment, data=request.data)
             if serializer.is_valid():
                 serializer.save()
@@ -224,6 +212,11 @@ class CocommentView(APIView):
             )
         else:
             cocomment.delete()
+            increase_count(
+                Feed.objects.filter(comment__id=cocomment.comment_id),
+                "comment_count",
+                -1,
+            )
             return Response({"message": "대댓글을 삭제했습니다."}, status=status.HTTP_200_OK)
 
 
@@ -239,32 +232,28 @@ class CocommentView(APIView):
 class FeedListView(APIView):
     """feed 전체 리스트 view"""
 
-    pagination_class = CustomPagination()
+    pagination_class = KeysetPagination
 
     def get(self, request, community_url):
         community = Community.objects.get(communityurl=community_url)
-        feed_list = Feed.objects.filter(category__community=community).order_by(
-            "-created_at"
+        feed_list = FeedListSerializer.setup_eager_loading(
+            Feed.objects.filter(community=community)
         )
-        if not feed_list:
+        if not feed_list.exists():
             return Response(
                 {"message": "아직 게시글이 없습니다."}, status=status.HTTP_204_NO_CONTENT
             )
         else:
-            paginated_feed_list = self.pagination_class.paginate_queryset(
-                feed_list, request
-            )
+            paginator = self.pagination_class()
+            paginated_feed_list = paginator.paginate_queryset(feed_list, request)
             serializer = FeedListSerializer(paginated_feed_list, many=True)
-            pagination_serializer = self.pagination_class.get_paginated_response(
-                serializer.data
-            )
-            return Response(pagination_serializer.data, status=status.HTTP_200_OK)
+            return paginator.get_paginated_response(serializer.data)
 
 
 class FeedCategoryListView(APIView):
     """feed 카테고리 리스트 view"""
 
-    pagination_class = CustomPagination()
+    pagination_class = KeysetPagination
 
     def get(self, request, community_url, category_url):
         community = get_object_or_404(Community, communityurl=community_url)
@@ -279,11 +268,13 @@ class FeedCategoryListView(APIView):
             .first()
             .category_name
         )
-        feed_list = Feed.objects.filter(
-            category__community__communityurl=community_url,
-            category__category_url=category_url,
-        ).order_by("-created_at")
-        if not feed_list:
+        feed_list = FeedListSerializer.setup_eager_loading(
+            Feed.objects.filter(
+                category__community__communityurl=community_url,
+                category__category_url=category_url,
+            )
+        )
+        if not feed_list.exists():
             return Response(
                 {
                     "community": community_serializer.data,
@@ -293,21 +284,22 @@ class FeedCategoryListView(APIView):
                 status=status.HTTP_200_OK,
             )
         else:
-            paginated_feed_list = self.pagination_class.paginate_queryset(
-                feed_list, request
+            paginator = self.pagination_class()
+            paginated_feed_list = paginator.paginate_queryset(feed_list, request)
+            notification_feed = feed_list.filter(is_notification=True).order_by(
+                "-created_at"
             )
-            notification_feed = feed_list.filter(is_notification=True)
             notification_serializer = FeedListSerializer(notification_feed, many=True)
             serializer = FeedListSerializer(paginated_feed_list, many=True)
-            pagination_serializer = self.pagination_class.get_paginated_response(
-                serializer.data
-            )
             return Response(
                 {
                     "community": community_serializer.data,
                     "category_name": category_name,
                     "categories": category_serializer.data,
-                    "feed": pagination_serializer.data,
+                    "feed": {
+                        **paginator.get_page_info(),
+                        "results": serializer.data,
+                    },
                     "notification": notification_serializer.data,
                 },
                 status=status.HTTP_200_OK,
@@ -364,22 +356,22 @@ class FeedDetailView(APIView):
         return Response(response, status=status.HTTP_200_OK)
 
     def put(self, request, community_url, feed_id):
-        feed = get_object_or_404(Feed, id=feed_id)
+        feed = get_object_or_404(Feed.objects.select_related("category"), id=feed_id)
         if feed.user != request.user:
             return Response(
                 {"error": "게시글 작성자만 수정할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN
             )
         else:
-            forbidden_word = ForbiddenWord.objects.filter(
-                community_id=feed.category.community.id
-            ).values_list("word", flat=True)
-            if forbidden_word:
-                for word in forbidden_word:
-                    if word in request.data["content"] or word in request.data["title"]:
-                        return Response(
-                            {"message": f"금지어 '{word}' 가 포함되어 있습니다"},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
+            words = find_forbidden_words(
+                feed.category.community_id,
+                request.data.get("title"),
+                request.data.get("content"),
+            )
+            if words:
+                return Response(
+                    {"message": f"금지어 '{', '.join(words)}' 가 포함되어 있습니다"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             serializer = FeedCreateSerializer(feed, data=request.data)
             if serializer.is_valid():
                 serializer.save(user=request.user)
@@ -388,12 +380,10 @@ class FeedDetailView(APIView):
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, community_url, feed_id):
-        feed = get_object_or_404(Feed, id=feed_id)
-        # 유저가 admin인지 확인
-        adminuser = CommunityAdmin.objects.filter(
-            user=request.user, community=feed.category.community
-        ).last()
-        if feed.user != request.user and not adminuser:
+        feed = get_object_or_404(Feed.objects.select_related("category"), id=feed_id)
+        if feed.user_id != request.user.id and not is_community_staff(
+            request, feed.category.community_id
+        ):
             return Response(
                 {"message": "게시글 작성자와 관리자만 삭제할 수 있습니다"},
                 status=status.HTTP_403_FORBIDDEN,
@@ -411,18 +401,18 @@ class FeedCreateView(APIView):
     def post(self, request, community_url):
         serializer = FeedCreateSerializer(data=request.data)
         category = get_object_or_404(Category, id=request.data["category_id"])
-        forbidden_word = ForbiddenWord.objects.filter(
-            community_id=category.community.id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["content"] or word in request.data["title"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        words = find_forbidden_words(
+            category.community_id,
+            request.data.get("title"),
+            request.data.get("content"),
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
-            serializer.save(user=request.user, category_id=request.data["category_id"])
+            serializer.save(user=request.user, category=category)
             return Response({"message": "게시글이 작성되었습니다"}, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -435,12 +425,34 @@ class LikeView(APIView):
 
     def post(self, request, feed_id):
         feed = get_object_or_404(Feed, id=feed_id)
-        if request.user in feed.likes.all():
-            feed.likes.remove(request.user)
+        if self.unlike(feed, request.user):
             return Response("좋아요를 취소했습니다.", status=status.HTTP_200_OK)
-        else:
-            feed.likes.add(request.user)
-            return Response("좋아요👍를 눌렀습니다.", status=status.HTTP_200_OK)
+        self.like(feed, request.user)
+        return Response("좋아요👍를 눌렀습니다.", status=status.HTTP_200_OK)
+
+    @staticmethod
+    def like(feed, user):
+        """좋아요 row 를 실제로 만들었을 때만 카운터 증가, 겹친 요청은 한 번만 반영"""
+        try:
+            with transaction.atomic():
+                _, created = Feed.likes.through.objects.get_or_create(
+                    feed_id=feed.id, user_id=user.id
+                )
+        except IntegrityError:
+            created = False
+        if created:
+            increase_count(Feed.objects.filter(id=feed.id), "like_count")
+        return created
+
+    @staticmethod
+    def unlike(feed, user):
+        """실제로 지운 좋아요 row 수만큼 카운터 감소"""
+        deleted, _ = Feed.likes.through.objects.filter(
+            feed_id=feed.id, user_id=user.id
+        ).delete()
+        if deleted:
+            increase_count(Feed.objects.filter(id=feed.id), "like_count", -deleted)
+        return deleted
 
 
 class FeedNotificationView(APIView):
@@ -449,14 +461,13 @@ class FeedNotificationView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, feed_id):
-        feed = get_object_or_404(Feed, id=feed_id)
-        community = Category.objects.get(id=feed.category_id).community
+        feed = get_object_or_404(
+            Feed.objects.select_related("category__community"), id=feed_id
+        )
+        community = feed.category.community
 
         # 유저가 admin인지 확인
-        user = CommunityAdmin.objects.filter(
-            user=request.user, community=community
-        ).last()
-        if not user:
+        if not is_community_staff(request, community.id):
             return Response(
                 {"message": "커뮤니티 관리자 권한이 없습니다"}, status=status.HTTP_403_FORBIDDEN
             )
@@ -487,15 +498,12 @@ class FeedNotificationView(APIView):
 
 
 class FeedSearchView(ListAPIView):
-    """Feed 검색"""
-
-    search_fields = (
-        "title",
-        "content",
-    )
-    filter_backends = [filters.SearchFilter]
-    queryset = Feed.objects.all()
+    """Feed 검색, 제목/본문 전문 검색 점수순"""
+
+    queryset = FeedListSerializer.setup_eager_loading(Feed.objects.all())
     serializer_class = FeedListSerializer
+    pagination_class = FullTextSearchPagination
+    search_index = feed_search_index
 
 
 class GroupPurchaseCreateView(APIView):
@@ -533,16 +541,14 @@ class GroupPurchaseCreateView(APIView):
             ),
             communityurl=community_url,
         )
-        forbidden_word = ForbiddenWord.objects.filter(
-            community_id=community.id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["content"] or word in request.data["title"]:
-                    return Response(
-                        {"message": f"금지어 {word}가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        words = find_forbidden_words(
+            community.id, request.data.get("title"), request.data.get("content")
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 {', '.join(words)}가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
             serializer.validate_datetime(request.data)
             serializer.save(
@@ -566,7 +572,8 @@ class GroupPurchaseDetailView(APIView):
     # 공구 상세 및 comment 함께 가져오기
     def get(self, request, community_url, grouppurchase_id):
         purchasefeed = get_object_or_404(
-            GroupPurchase.objects.select_related("community"), id=grouppurchase_id
+            GroupPurchase.objects.select_related("community").with_status(),
+            id=grouppurchase_id,
         )
         purchase_serializer = GroupPurchaseDetailSerializer(purchasefeed)
         commnity_serializer = CommunityUrlSerializer(
@@ -592,16 +599,16 @@ class GroupPurchaseDetailView(APIView):
             ),
             id=grouppurchase_id,
         )
-        forbidden_word = ForbiddenWord.objects.filter(
-            community=purchasefeed.community
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["content"] or word in request.data["title"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        words = find_forbidden_words(
+            purchasefeed.community_id,
+            request.data.get("title"),
+            request.data.get("content"),
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if purchasefeed.user != request.user:
             return Response(
                 {"error": "공구 게시글 작성자만 수정할 수 있습니다."}, status=status.HTTP_400_BAD_REQUEST
@@ -643,21 +650,34 @@ class GroupPurchaseDetailView(APIView):
 class GroupPurchaseListView(APIView):
     """공구 list view"""
 
+    pagination_class = GroupPurchasePagination
+    closing_pagination_class = GroupPurchaseClosingPagination
+
     def get(self, request, community_url):
+        """`?status=open|before|ended` 상태 필터, `?ordering=closing` 진행 중 먼저 마감 임박순"""
         community = get_object_or_404(Community, communityurl=community_url)
         feed_list = (
             GroupPurchase.objects.filter(community_id=community.id)
-            .order_by("-created_at")
-            .order_by("-is_ended")
+            .with_status()
+            .filter_status(request.query_params.get("status"))
         )
-        if not feed_list:
+        if not feed_list.exists():
             return Response(
                 {"message": "아직 게시글이 없습니다."}, status=status.HTTP_204_NO_CONTENT
             )
         else:
-            serializer = GroupPurchaseListSerializer(feed_list, many=True)
+            if request.query_params.get("ordering") == "closing":
+                paginator = self.closing_pagination_class()
+            else:
+                paginator = self.pagination_class()
+            paginated_feed_list = paginator.paginate_queryset(feed_list, request)
+            serializer = GroupPurchaseListSerializer(paginated_feed_list, many=True)
             return Response(
-                {"message": "공동구매 게시글 목록을 가져왔습니다", "data": serializer.data},
+                {
+                    "message": "공동구매 게시글 목록을 가져왔습니다",
+                    "data": serializer.data,
+                    **paginator.get_page_info(),
+                },
                 status=status.HTTP_200_OK,
             )
 
@@ -669,15 +689,10 @@ class GroupPurchaseJoinedUserView(APIView):
 
     @transaction.atomic
     def post(self, request, community_url, grouppurchase_id):
-        purchasefeed = get_object_or_404(GroupPurchase, id=grouppurchase_id)
-        purchase_quantity = (
-            JoinedUser.objects.exclude(user=request.user)
-            .filter(grouppurchase_id=grouppurchase_id)
-            .aggregate(Sum("product_quantity"))
-            .get("product_quantity__sum")
-            or 0
+        # 같은 공구 참여 요청만 순서대로 처리되도록 해당 공구 row 만 잠근다
+        purchasefeed = get_object_or_404(
+            GroupPurchase.objects.select_for_update(), id=grouppurchase_id
         )
-        remain_quantity = purchasefeed.product_number - purchase_quantity
         join_purchase = JoinedUser.objects.filter(
             user_id=request.user.id, grouppurchase_id=grouppurchase_id
         ).last()
@@ -687,7 +702,7 @@ class GroupPurchaseJoinedUserView(APIView):
                 {"message": "유저 프로필을 업데이트 해주세요! 상세 정보가 없으면 공구를 진행할 수 없습니다."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        if purchasefeed.check_end_person_limit_point(grouppurchase_id):
+        if purchasefeed.is_full:
             return Response(
                 {"message": "공구 인원이 모두 찼습니다!"},
                 status=status.HTTP_405_METHOD_NOT_ALLOWED,
@@ -697,6 +712,10 @@ class GroupPurchaseJoinedUserView(APIView):
                 {"message": "이미 종료된 공구입니다!"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        over_quantity = Response(
+            {"message": "신청 수량이 남은 수량보다 많습니다."},
+            status=status.HTTP_406_NOT_ACCEPTABLE,
+        )
         if not join_purchase:
             if quantity < 1:
                 return Response(
@@ -704,10 +723,10 @@ class GroupPurchaseJoinedUserView(APIView):
                 )
             serializer = JoinedUserCreateSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
+            # 수량/인원 예약과 인원이 찼을 때 마감을 UPDATE 한 번으로
+            if not reserve(grouppurchase_id, quantity, 1):
+                return over_quantity
             serializer.save(user=request.user, grouppurchase_id=grouppurchase_id)
-            # save한 후 join인원 체크 및 마감여부 확인
-            if purchasefeed.check_end_person_limit_point(grouppurchase_id):
-                pass
             return Response(
                 {
                     "message": "공구를 신청했습니다.",
@@ -715,43 +734,38 @@ class GroupPurchaseJoinedUserView(APIView):
                 status=status.HTTP_201_CREATED,
             )
         # True
-        joined_user = JoinedUser.objects.get(
-            user_id=request.user.id, grouppurchase_id=grouppurchase_id
-        )
+        joined_user = join_purchase
         serializer = JoinedUserSerializer(joined_user, data=request.data)
         if quantity < 0 or quantity == joined_user.product_quantity:
             return Response(
                 {"message": "수량을 다시 확인해주세요"}, status=status.HTTP_400_BAD_REQUEST
             )
-        if quantity > remain_quantity:
-            return Response(
-                {"message": "신청 수량이 남은 수량보다 많습니다."},
-                status=status.HTTP_406_NOT_ACCEPTABLE,
-            )
+        reserved = 0 if joined_user.is_deleted else joined_user.product_quantity
+        if quantity - reserved > purchasefeed.remain_quantity:
+            return over_quantity
         serializer.is_valid(raise_exception=True)
         if joined_user.is_deleted is True:
+            if not reserve(grouppurchase_id, quantity, 1):
+                return over_quantity
             serializer.save(is_deleted=False)
             return Response(
                 {"message": "공구를 재 신청했습니다.", "data": serializer.data},
                 status=status.HTTP_202_ACCEPTED,
             )
         if quantity <= 0:
+            reserve(grouppurchase_id, -reserved, -1)
             serializer.save(is_deleted=True)
             return Response(
                 {"message": "공구 신청을 취소했습니다.", "data": serializer.data},
                 status=status.HTTP_202_ACCEPTED,
             )
-        if quantity != joined_user.product_quantity:
-            serializer.save()
-            return Response(
-                {"message": "공구 수량을 수정했습니다.", "data": serializer.data},
-                status=status.HTTP_202_ACCEPTED,
-            )
-        else:
-            return Response(
-                {"message": "알 수 없는 오류!", "data": serializer.data},
-                status=status.HTTP_408_REQUEST_TIMEOUT,
-            )
+        if not reserve(grouppurchase_id, quantity - reserved):
+            return over_quantity
+        serializer.save()
+        return Response(
+            {"message": "공구 수량을 수정했습니다.", "data": serializer.data},
+            status=status.HTTP_202_ACCEPTED,
+        )
 
 
 class GroupPurchaseSelfEndView(APIView):
@@ -784,16 +798,15 @@ class GroupPurchaseCommentView(APIView):
 
     def post(self, request, community_url, grouppurchase_id):
         serializer = GroupPurchaseCommentSerializer(data=request.data)
-        forbidden_word = ForbiddenWord.objects.filter(
-            community__purchase_community__id=grouppurchase_id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["text"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        purchasefeed = get_object_or_404(GroupPurchase, id=grouppurchase_id)
+        words = find_forbidden_words(
+            purchasefeed.community_id, request.data.get("text")
+        )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if serializer.is_valid():
             serializer.save(user=request.user, grouppurchase_id=grouppurchase_id)
             return Response(
@@ -804,18 +817,17 @@ class GroupPurchaseCommentView(APIView):
 
     def put(self, request, purchase_comment_id):
         purchase_comment = get_object_or_404(
-            GroupPurchaseComment, id=purchase_comment_id
+            GroupPurchaseComment.objects.select_related("grouppurchase"),
+            id=purchase_comment_id,
+        )
+        words = find_forbidden_words(
+            purchase_comment.grouppurchase.community_id, request.data.get("text")
         )
-        forbidden_word = ForbiddenWord.objects.filter(
-            community__purchase_community__p_comment__id=purchase_comment_id
-        ).values_list("word", flat=True)
-        if forbidden_word:
-            for word in forbidden_word:
-                if word in request.data["text"]:
-                    return Response(
-                        {"message": f"금지어 '{word}' 이/가 포함되어 있습니다"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+        if words:
+            return Response(
+                {"message": f"금지어 '{', '.join(words)}' 이/가 포함되어 있습니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         if purchase_comment.user != request.user:
             return Response(
                 {"error": "댓글 작성자만 수정할 수 있습니다."}, status=status.HTTP_403_FORBIDDEN
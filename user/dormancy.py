@@ -0,0 +1,124 @@
+"""휴면 전환, 휴면 예정 안내, 탈퇴 5년 지난 회원 삭제
+
+한 번에 UPDATE/DELETE 하지 않고 id 순서(keyset)로 batch 를 나눠 batch 마다 따로 commit 한다.
+단계별로 마지막으로 처리한 id 를 그날의 checkpoint 로 cache 에 남겨서,
+중간에 멈춘 작업을 같은 날 다시 돌리면 끝난 단계와 batch 는 건너뛰고 이어서 한다.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+EMAIL_BATCH_SIZE = 100
+# 탈퇴 회원 삭제는 게시글/댓글 등으로 cascade 되므로 작게 나누고 batch 사이에 쉰다
+DELETE_BATCH_SIZE = 50
+DELETE_PAUSE = 0.5
+CHECKPOINT_KEY = "dormancy:{}:{}"
+CHECKPOINT_TIMEOUT = 60 * 60 * 48
+DONE = "done"
+
+NOTICE_SUBJECT = "회원님의 계정이 1달뒤에 휴면계정 처리 될 예정입니다"
+NOTICE_MESSAGE = "회원님의 활동이 없어서 계정이 1달뒤에 휴면계정 처리가 될 예정입니다. 계정을 활성화 하시려면 로그인을 해주세요."
+
+
+def iter_batches(queryset, key, batch_size, process):
+    """
+    queryset 의 id 를 batch_size 개씩, checkpoint 이후부터 process(ids) 로 처리
+    process 가 끝나면 바로 checkpoint 를 남기고 (ids, process 반환값) 을 내보낸다
+    """
+    last_id = cache.get(key, 0)
+    if last_id == DONE:
+        return
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            cache.set(key, DONE, CHECKPOINT_TIMEOUT)
+            return
+        result = process(ids)
+        last_id = ids[-1]
+        cache.set(key, last_id, CHECKPOINT_TIMEOUT)
+        yield ids, result
+
+
+def make_dormant(ids):
+    with transaction.atomic():
+        return User.objects.filter(id__in=ids, is_dormant=False).update(is_dormant=True)
+
+
+def purge(ids):
+    with transaction.atomic():
+        User.objects.filter(id__in=ids).delete()
+    time.sleep(DELETE_PAUSE)
+    return len(ids)
+
+
+def run_dormancy(send_notice, now=None):
+    """
+    휴면 전환 -> 휴면 예정 안내 -> 탈퇴 회원 삭제 순서로 처리
+    send_notice(subject, message, recipient_list) 는 EMAIL_BATCH_SIZE 명씩 호출된다
+    단계별 {"batches", "users", "seconds"} 반환
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+
+    def notify(ids):
+        emails = list(User.objects.filter(id__in=ids).values_list("email", flat=True))
+        send_notice(NOTICE_SUBJECT, NOTICE_MESSAGE, emails)
+        return len(emails)
+
+    stages = (
+        (
+            "dormant",
+            User.objects.filter(
+                last_login__lt=now - timezone.timedelta(days=365), is_dormant=False
+            ),
+            BATCH_SIZE,
+            make_dormant,
+        ),
+        (
+            "notice",
+            User.objects.filter(
+                last_login__lt=now - timezone.timedelta(days=330),
+                last_login__gt=now - timezone.timedelta(days=331),
+                is_dormant=False,
+            ),
+            EMAIL_BATCH_SIZE,
+            notify,
+        ),
+        (
+            "purge",
+            User.objects.filter(withdraw_at__lt=now - timezone.timedelta(days=1825)),
+            DELETE_BATCH_SIZE,
+            purge,
+        ),
+    )
+    report = {}
+    for stage, queryset, batch_size, process in stages:
+        started = time.monotonic()
+        progress = report[stage] = {"batches": 0, "users": 0, "seconds": 0}
+        for ids, users in iter_batches(
+            queryset, CHECKPOINT_KEY.format(today, stage), batch_size, process
+        ):
+            progress["batches"] += 1
+            progress["users"] += users
+            logger.info(
+                "dormancy %s: batch %d, %d users, last id %d",
+                stage,
+                progress["batches"],
+                progress["users"],
+                ids[-1],
+            )
+        progress["seconds"] = round(time.monotonic() - started, 3)
+    logger.info("dormancy finished: %s", report)
+    return report
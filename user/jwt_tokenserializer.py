@@ -1,21 +1,24 @@
-from datetime import timedelta
-
 from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
+from rest_framework.exceptions import NotFound, Throttled
 from rest_framework_simplejwt.serializers import (
     TokenObtainSerializer,
     update_last_login,
-    authenticate,
     RefreshToken,
 )
 from rest_framework_simplejwt.settings import api_settings
-from .models import User, LoginLog
+from .loginlog import get_ip_address, record_login
+from .models import User
+from .ratelimit import LoginRateLimiter
 
 
 class CustomTokenObtainPairSerializer(TokenObtainSerializer):
     default_error_messages = {"no_active_account": "아이디나 비밀번호가 틀립니다"}
     token_class = RefreshToken
+    withdraw_message = "탈퇴한 회원입니다. 탈퇴를 취소하시려면 다시 로그인해주세요"
+    dormant_message = "휴면계정으로 전환된 회원입니다. 계정을 활성화 하시려면 다시 로그인해주세요"
+    banned_message = "5회 이상 로그인 실패로 5분간 로그인이 불가능합니다"
+    throttled_message = "로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요"
 
     @classmethod
     def get_token(cls, user):
@@ -25,95 +28,78 @@ class CustomTokenObtainPairSerializer(TokenObtainSerializer):
         return token
 
     def validate(self, attrs):
-        authenticate_kwargs = {
-            self.username_field: attrs[self.username_field],
-            "password": attrs["password"],
-        }
-        try:
-            authenticate_kwargs["request"] = self.context["request"]
-        except KeyError:
-            pass
-
-        self.user = authenticate(**authenticate_kwargs)
-
-        self.target = get_object_or_404(User, email=attrs[self.username_field])
-        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
-            if self.target:
-                if self.target.login_count < 5:
-                    self.target.login_count += 1
-                    self.target.save()
-                elif self.target.login_count >= 5:
-                    self.target.banned_at = timezone.now() + timedelta(minutes=5)
-                    self.target.save()
-                    raise serializers.ValidationError("5회 이상 로그인 실패로 5분간 로그인이 불가능합니다")
-
+        """
+        로그인 실패 제한(user.ratelimit)은 DB 조회 전에 검사
+        탈퇴/휴면 안내와 login_count 기록은 비밀번호 확인 뒤에 해서 계정 상태가 드러나지 않게 한다
+        유저는 한 번만 조회하고 바뀐 필드는 update_fields 로 한 번에 저장,
+        로그인 기록은 user.loginlog 버퍼로
+        """
+        request = self.context.get("request")
+        limiter = LoginRateLimiter(
+            attrs[self.username_field],
+            get_ip_address(request) if request is not None else None,
+        )
+        locked = limiter.locked()
+        if "ip" in locked:
+            raise Throttled(limiter.ip_lockout, self.throttled_message)
+        if "email" in locked:
+            raise serializers.ValidationError(self.banned_message)
+
+        user = User.objects.filter(email=attrs[self.username_field]).first()
+        if user is None:
+            limiter.fail()
+            raise NotFound()
+        now = timezone.now()
+
+        if not (
+            user.check_password(attrs["password"])
+            and api_settings.USER_AUTHENTICATION_RULE(user)
+        ):
+            locked = limiter.fail()
+            if "ip" in locked:
+                raise Throttled(limiter.ip_lockout, self.throttled_message)
+            if "email" in locked:
+                raise serializers.ValidationError(self.banned_message)
             raise serializers.ValidationError(
                 self.error_messages["no_active_account"],
                 "no_active_account",
             )
-
-        if self.target.is_withdraw:
-            if self.target.login_count < 1:
-                self.target.login_count += 1
-                self.target.save()
-                raise serializers.ValidationError("탈퇴한 회원입니다. 탈퇴를 취소하시려면 다시 로그인해주세요")
-            elif self.target.login_count > 1:
-                self.target.login_count = 1
-                self.target.save()
-                raise serializers.ValidationError("탈퇴한 회원입니다. 탈퇴를 취소하시려면 다시 로그인해주세요")
-            else:
-                self.target.is_withdraw = False
-                self.target.banned_at = None
-                self.target.login_count = 0
-                self.target.save()
-
-        elif self.target.is_dormant:
-            if self.target.login_count < 1:
-                self.target.login_count += 1
-                self.target.save()
-                raise serializers.ValidationError(
-                    "휴면계정으로 전환된 회원입니다. 계정을 활성화 하시려면 다시 로그인해주세요"
-                )
-            elif self.target.login_count > 1:
-                self.target.login_count = 1
-                self.target.save()
-                raise serializers.ValidationError(
-                    "휴면계정으로 전환된 회원입니다. 계정을 활성화 하시려면 다시 로그인해주세요"
-                )
-            else:
-                self.target.is_dormant = False
-                self.target.banned_at = None
-                self.target.login_count = 0
-                self.target.save()
-
-        if self.target.banned_at and self.target.banned_at > timezone.now():
-            raise serializers.ValidationError("5회 이상 로그인 실패로 5분간 로그인이 불가능합니다")
-        elif self.target.banned_at and self.target.banned_at < timezone.now():
-            self.target.banned_at = None
-            self.target.login_count = 0
-            self.target.save()
-
-        request = self.context.get("request")
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip_address = x_forwarded_for.split(",")[0]
-        else:
-            ip_address = request.META.get("REMOTE_ADDR")
-
-        LoginLog.objects.create(user=self.target, ip_address=ip_address)
-
-        self.target.login_count = 0
-        self.target.save()
-
-        refresh = self.get_token(self.user)
-
-        attrs["refresh"] = str(refresh)
-        attrs["access"] = str(refresh.access_token)
-
+        limiter.succeed()
+
+        # 탈퇴/휴면 회원은 첫 로그인에서 안내하고, 다음 로그인 성공시 해제
+        for flag, message in (
+            ("is_withdraw", self.withdraw_message),
+            ("is_dormant", self.dormant_message),
+        ):
+            if not getattr(user, flag):
+                continue
+            if user.login_count != 1:
+                user.login_count = 1
+                user.save(update_fields=["login_count"])
+                raise serializers.ValidationError(message)
+            break
+
+        updates = {"login_count": 0, "banned_at": None}
+        if user.is_withdraw:
+            updates["is_withdraw"] = False
+        elif user.is_dormant:
+            updates["is_dormant"] = False
         if api_settings.UPDATE_LAST_LOGIN:
-            update_last_login(None, self.user)
-
-        return {"access": attrs["access"], "refresh": attrs["refresh"]}
+            updates["last_login"] = now
+        update_fields = [
+            field for field, value in updates.items() if getattr(user, field) != value
+        ]
+        if update_fields:
+            for field in update_fields:
+                setattr(user, field, updates[field])
+            user.save(update_fields=update_fields)
+
+        if request is not None:
+            record_login(user, request)
+
+        self.user = user
+        refresh = self.get_token(user)
+        return {"access": str(refresh.access_token), "refresh": str(refresh)}
 
     @classmethod
     def social_token(self, user):
@@ -0,0 +1,176 @@
+"""로그인 기록 버퍼
+
+로그인마다 LoginLog 를 바로 insert 하지 않고 Redis 에 모아두었다가
+주기적으로 bulk_create 로 한 번에 저장한다.
+Redis 가 없으면 flush 하는 celery 프로세스가 웹 프로세스의 버퍼를 볼 수 없으므로 바로 insert 한다.
+하루가 지나면 유저별/IP별 로그인 수를 UserLoginDaily/IpLoginDaily 로 집계해두고,
+통계 조회는 원본 대신 집계 테이블을 읽는다.
+"""
+
+import json
+import threading
+from datetime import datetime, time, timedelta
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.throttling import BaseThrottle
+
+from .models import IpLoginDaily, LoginLog, User, UserLoginDaily
+
+KEY = "loginlog"
+FLUSH_BATCH_SIZE = 1000
+
+
+class LocalLoginLogStore:
+    """Redis가 없는 로컬/테스트 환경용 저장소, 프로세스마다 따로라서 record_login 은 쓰지 않는다"""
+
+    shared = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.flushing = []
+
+    def push(self, entry):
+        with self.lock:
+            self.pending.append(entry)
+
+    def take(self):
+        with self.lock:
+            if not self.flushing:
+                self.flushing, self.pending = self.pending, []
+            return list(self.flushing)
+
+    def ack(self):
+        with self.lock:
+            self.flushing = []
+
+    def clear(self):
+        with self.lock:
+            self.pending = []
+            self.flushing = []
+
+
+class RedisLoginLogStore:
+    """list 에 RPUSH, flush 시 list 를 rename 해서 원자적으로 가져오기"""
+
+    flushing_key = KEY + ":flushing"
+    shared = True
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def push(self, entry):
+        self.client.rpush(KEY, json.dumps(entry))
+
+    def take(self):
+        # 이전 flush 가 실패해서 남은 값이 있으면 그것부터 다시 저장
+        if not self.client.exists(self.flushing_key):
+            try:
+                self.client.rename(KEY, self.flushing_key)
+            except redis.ResponseError:
+                return []
+        return [
+            json.loads(entry) for entry in self.client.lrange(self.flushing_key, 0, -1)
+        ]
+
+    def ack(self):
+        self.client.delete(self.flushing_key)
+
+    def clear(self):
+        self.client.delete(KEY, self.flushing_key)
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if settings.REDIS_URL:
+            _store = RedisLoginLogStore(settings.REDIS_URL)
+        else:
+            _store = LocalLoginLogStore()
+    return _store
+
+
+def get_ip_address(request):
+    """
+    클라이언트 IP, X-Forwarded-For 의 맨 앞은 클라이언트가 마음대로 넣을 수 있으므로
+    DRF throttle 과 같이 NUM_PROXIES 개의 프록시가 붙인 주소만 믿는다
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def record_login(user, request):
+    """로그인 기록, 공유 저장소(Redis)면 버퍼에 넣고(DB write 없음) 아니면 바로 insert"""
+    store = get_store()
+    if not store.shared:
+        LoginLog.objects.create(user=user, ip_address=get_ip_address(request))
+        return
+    store.push(
+        {
+            "user_id": user.id,
+            "ip_address": get_ip_address(request),
+            "created_at": timezone.now().isoformat(),
+        }
+    )
+
+
+def flush_login_logs():
+    """쌓인 로그인 기록을 FLUSH_BATCH_SIZE 개씩 bulk_create, 저장한 수 반환"""
+    store = get_store()
+    entries = store.take()
+    if not entries:
+        return 0
+    # 그 사이 삭제된 유저의 기록은 건너뜀
+    user_ids = {entry["user_id"] for entry in entries}
+    user_ids = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    logs = [
+        LoginLog(
+            user_id=entry["user_id"],
+            ip_address=entry["ip_address"],
+            created_at=parse_datetime(entry["created_at"]),
+        )
+        for entry in entries
+        if entry["user_id"] in user_ids
+    ]
+    with transaction.atomic():
+        LoginLog.objects.bulk_create(logs, batch_size=FLUSH_BATCH_SIZE)
+    store.ack()
+    return len(logs)
+
+
+def rollup_login_logs(day):
+    """
+    day(로컬 날짜) 의 로그인 기록을 유저별/IP별로 다시 집계, 여러 번 돌려도 결과는 같다
+    {"users": 유저 수, "ips": IP 수} 반환
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    logs = LoginLog.objects.filter(
+        created_at__gte=start, created_at__lt=start + timedelta(days=1)
+    ).order_by()
+    by_user = logs.values_list("user_id").annotate(count=Count("id"))
+    by_ip = logs.values_list("ip_address").annotate(count=Count("id"))
+    with transaction.atomic():
+        UserLoginDaily.objects.filter(date=day).delete()
+        users = UserLoginDaily.objects.bulk_create(
+            [
+                UserLoginDaily(date=day, user_id=user_id, count=count)
+                for user_id, count in by_user
+            ],
+            batch_size=FLUSH_BATCH_SIZE,
+        )
+        IpLoginDaily.objects.filter(date=day).delete()
+        ips = IpLoginDaily.objects.bulk_create(
+            [
+                IpLoginDaily(date=day, ip_address=ip_address, count=count)
+                for ip_address, count in by_ip
+            ],
+            batch_size=FLUSH_BATCH_SIZE,
+        )
+    return {"users": len(users), "ips": len(ips)}
@@ -0,0 +1,157 @@
+"""메일 발송
+
+워커 프로세스마다 메일 backend 연결 하나를 열어두고 task 끼리 재사용한다.
+여러 명에게 보내는 메일은 수신자마다 메시지를 만들어 BATCH_SIZE 개씩 한 연결로 한 통씩 보내고,
+발송 한도(EMAIL_RATE_PER_MINUTE/EMAIL_RATE_PER_DAY)는 cache 카운터로 워커 전체에서 지킨다.
+한도에 걸리거나 연결이 실패하면 보내지 못한 메시지만 task retry 로 다시 보낸다.
+"""
+import functools
+import smtplib
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.template import loader
+
+BATCH_SIZE = 50
+# SMTP 서버가 먼저 끊기 전에 다시 연결
+IDLE_TIMEOUT = 60
+MAX_RETRIES = 5
+RETRY_BACKOFF = 30
+RETRY_BACKOFF_MAX = 600
+
+
+class MailNotSent(Exception):
+    """앞의 sent 개만 보내고 멈춤, wait 가 있으면 발송 한도 때문이고 wait 초 뒤에 다시"""
+
+    def __init__(self, sent, wait=None):
+        super().__init__(sent, wait)
+        self.sent = sent
+        self.wait = wait
+
+
+class MailConnectionPool:
+    """프로세스당 메일 연결 하나, fork 전에는 열지 않으므로 워커마다 따로 연결된다"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connection = None
+        self.used_at = 0
+
+    def get(self):
+        if (
+            self.connection is not None
+            and time.monotonic() - self.used_at > IDLE_TIMEOUT
+        ):
+            self.close()
+        if self.connection is None:
+            self.connection = get_connection()
+            self.connection.open()
+        return self.connection
+
+    def send_messages(self, messages):
+        with self.lock:
+            try:
+                sent = self.get().send_messages(messages) or 0
+            except (smtplib.SMTPException, OSError):
+                self.close()
+                raise
+            self.used_at = time.monotonic()
+            return sent
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.connection = None
+
+
+pool = MailConnectionPool()
+
+
+@worker_process_shutdown.connect
+def close_pool(**kwargs):
+    pool.close()
+
+
+class MailRateLimiter:
+    """분/일 고정 window 발송 수, 자리가 없으면 다음 window 까지 기다릴 초"""
+
+    key = "mail:rate:{}:{}"
+
+    def __init__(self, per_minute=None, per_day=None):
+        self.per_minute = per_minute or settings.EMAIL_RATE_PER_MINUTE
+        self.per_day = per_day or settings.EMAIL_RATE_PER_DAY
+
+    def acquire(self, count):
+        """count 통 보낼 자리를 잡으면 0, 한도를 넘으면 잡은 자리는 돌려놓고 기다릴 초"""
+        now = time.time()
+        taken = []
+        for window, limit in ((60, self.per_minute), (60 * 60 * 24, self.per_day)):
+            key = self.key.format(window, int(now // window))
+            cache.add(key, 0, window * 2)
+            try:
+                used = cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, window * 2)
+                used = count
+            taken.append(key)
+            if used > limit:
+                for key in taken:
+                    try:
+                        cache.decr(key, count)
+                    except ValueError:
+                        pass
+                return window - now % window
+        return 0
+
+
+@functools.lru_cache(maxsize=None)
+def get_template(name):
+    """템플릿은 프로세스마다 한 번만 읽어서 compile"""
+    return loader.get_template(name)
+
+
+def render(name, context):
+    return get_template(name).render(context)
+
+
+def send(messages, limiter=None):
+    """
+    messages 를 BATCH_SIZE 개씩 발송 한도 안에서 보내고 보낸 수 반환
+    batch 안에서도 한 통씩 보내고 세서, 한도에 걸리거나 연결이 실패하면
+    그때까지 보낸 수를 담아 MailNotSent (batch 중간에 실패해도 보낸 메일은 다시 보내지 않음)
+    """
+    limiter = limiter or MailRateLimiter()
+    size = min(BATCH_SIZE, limiter.per_minute)
+    sent = 0
+    for start in range(0, len(messages), size):
+        batch = messages[start : start + size]
+        wait = limiter.acquire(len(batch))
+        if wait:
+            raise MailNotSent(sent, wait)
+        for message in batch:
+            try:
+                pool.send_messages([message])
+            except (smtplib.SMTPException, OSError) as error:
+                raise MailNotSent(sent) from error
+            sent += 1
+    return sent
+
+
+def retry_unsent(task, error, args):
+    """
+    보내지 못한 메일만 args 로 다시 보내도록 task retry
+    발송 한도면 한도가 풀릴 때 새 task 로(retry 횟수에 넣지 않음), 연결 실패면 backoff
+    """
+    if error.wait is not None:
+        task.apply_async(args=args, countdown=error.wait)
+        return
+    countdown = min(RETRY_BACKOFF * 2**task.request.retries, RETRY_BACKOFF_MAX)
+    raise task.retry(args=args, exc=error.__cause__, countdown=countdown)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from user.partitions import (
+    MONTHS_AHEAD,
+    ensure_partitions,
+    is_supported,
+    partition_login_log,
+)
+
+
+class Command(BaseCommand):
+    help = "login_log 를 월별 파티션 테이블로 변환하고 다음 달 파티션 생성 (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=MONTHS_AHEAD,
+            help="이번 달부터 미리 만들어둘 파티션 수",
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("login_log 파티션은 PostgreSQL 에서만 지원합니다")
+        if partition_login_log(options["months_ahead"]):
+            self.stdout.write("login_log 를 월별 파티션 테이블로 변환했습니다")
+        created = ensure_partitions(options["months_ahead"])
+        self.stdout.write(
+            self.style.SUCCESS(f"파티션 추가 {len(created)}개: {', '.join(created)}")
+        )
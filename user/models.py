@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
 from django.core.validators import RegexValidator
 
@@ -123,6 +124,9 @@ class GuestBook(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["profile", "-created_at", "-id"])]
+
     def __str__(self):
         return str(self.user)
 
@@ -137,9 +141,52 @@ class PasswordReset(models.Model):
 
 
 class LoginLog(models.Model):
+    """
+    로그인 기록, 추가만 하는 테이블
+    Postgres 에서는 user.partitions 로 created_at 월별 파티션 테이블로 바꿔서 쓴다
+    """
+
     class Meta:
         db_table = "login_log"
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="login_log_user_created")
+        ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     ip_address = models.GenericIPAddressField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # user.loginlog 버퍼에서 나중에 저장되므로 auto_now_add 대신 로그인 시각을 넣는다
+    created_at = models.DateTimeField(default=timezone.now)
+
+
+class UserLoginDaily(models.Model):
+    """유저별 하루 로그인 수 (LoginLog 집계)"""
+
+    class Meta:
+        db_table = "login_user_daily"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "user"], name="login_user_daily_unique"
+            )
+        ]
+        indexes = [models.Index(fields=["user", "date"])]
+
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+
+class IpLoginDaily(models.Model):
+    """IP별 하루 로그인 수 (LoginLog 집계)"""
+
+    class Meta:
+        db_table = "login_ip_daily"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "ip_address"], name="login_ip_daily_unique"
+            )
+        ]
+        indexes = [models.Index(fields=["ip_address", "date"])]
+
+    date = models.DateField()
+    ip_address = models.GenericIPAddressField()
+    count = models.PositiveIntegerField(default=0)
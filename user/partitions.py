@@ -0,0 +1,202 @@
+"""login_log 월별 파티션
+
+makemigrations 로 만들어지는 login_log 는 일반 테이블이라, Postgres 에서는 배포 후 한 번
+`manage.py partition_login_log` 로 created_at 월별 range 파티션 테이블로 바꾼다.
+보관 기간이 지난 달은 파티션 DROP 으로 행 수와 무관하게 지운다.
+SQLite 등 다른 DB 는 일반 테이블 그대로 두고 batch DELETE 로 정리한다.
+파티션이 없는 달의 행은 default 파티션에 쌓이므로, 그 달 파티션을 만들 때 옮기고
+보관 기간이 지난 행은 batch DELETE 로 지운다.
+"""
+import logging
+import re
+from datetime import datetime
+
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+
+from .models import LoginLog, User
+
+logger = logging.getLogger(__name__)
+
+TABLE = LoginLog._meta.db_table
+DEFAULT = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+RETENTION_MONTHS = 12
+MONTHS_AHEAD = 2
+DELETE_BATCH_SIZE = 5000
+
+
+def month_start(year, month):
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def add_months(start, months):
+    month = start.month - 1 + months
+    return month_start(start.year + month // 12, month % 12 + 1)
+
+
+def current_month(now=None):
+    now = timezone.localtime(now)
+    return month_start(now.year, now.month)
+
+
+def partition_name(start):
+    return f"{TABLE}_p{start:%Y%m}"
+
+
+def is_supported():
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """[(파티션 이름, 시작 월)], default 파티션은 제외"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, month_start(*map(int, match.groups()))))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(cursor, start):
+    """
+    start 달 파티션 생성, default 파티션에 그 달 행이 있으면 새 파티션으로 옮긴 뒤 붙인다
+    (default 에 범위 안의 행이 남아 있으면 PARTITION OF/ATTACH 가 실패)
+    """
+    name = partition_name(start)
+    bounds = [start, add_months(start, 1)]
+    with transaction.atomic():
+        cursor.execute(f'LOCK TABLE "{DEFAULT}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT}"'
+            " WHERE created_at >= %s AND created_at < %s RETURNING *)"
+            f' INSERT INTO "{name}" SELECT * FROM moved',
+            bounds,
+        )
+        if cursor.rowcount:
+            logger.warning(
+                "moved %d login logs from %s to %s", cursor.rowcount, DEFAULT, name
+            )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}"'
+            " FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD, now=None):
+    """이번 달부터 months_ahead 달 뒤까지 파티션 생성, 파티션 테이블이 아니면 아무것도 안 함"""
+    if not is_partitioned():
+        return []
+    existing = {name for name, _ in list_partitions()}
+    start = current_month(now)
+    created = []
+    with connection.cursor() as cursor:
+        for months in range(months_ahead + 1):
+            month = add_months(start, months)
+            if partition_name(month) not in existing:
+                create_partition(cursor, month)
+                created.append(partition_name(month))
+    return created
+
+
+def partition_login_log(months_ahead=MONTHS_AHEAD):
+    """
+    일반 테이블 login_log 를 created_at 월별 파티션 테이블로 변환, 이미 파티션이면 False
+    기존 행은 새 테이블로 복사하고, 인덱스는 복사 후에 만든다
+    파티션 테이블의 PK 는 파티션 키를 포함해야 해서 (id, created_at)
+    """
+    if not is_supported():
+        raise NotSupportedError("login_log 파티션은 PostgreSQL 에서만 지원합니다")
+    if is_partitioned():
+        return False
+    legacy = f"{TABLE}_legacy"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS'
+            " INCLUDING IDENTITY) PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'SELECT min(created_at) FROM "{legacy}"')
+        oldest = cursor.fetchone()[0]
+        month = current_month(oldest)
+        last = add_months(current_month(), months_ahead)
+        while month <= last:
+            create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{legacy}"')
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1,"
+            f' false) FROM "{TABLE}"',
+            [f'"{TABLE}"'],
+        )
+        cursor.execute(f'DROP TABLE "{legacy}"')
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_user_id_fk"'
+            f' FOREIGN KEY (user_id) REFERENCES "{User._meta.db_table}" (id)'
+            " DEFERRABLE INITIALLY DEFERRED"
+        )
+        for index in LoginLog._meta.indexes:
+            columns = ", ".join(
+                LoginLog._meta.get_field(field).column for field in index.fields
+            )
+            cursor.execute(f'CREATE INDEX "{index.name}" ON "{TABLE}" ({columns})')
+    return True
+
+
+def prune_login_logs(retention_months=RETENTION_MONTHS, now=None):
+    """
+    retention_months 달보다 오래된 로그인 기록 삭제
+    파티션 테이블이면 지난 달 파티션을 DROP 하고 default 파티션의 지난 행은
+    DELETE_BATCH_SIZE 개씩 삭제, 아니면 테이블에서 DELETE_BATCH_SIZE 개씩 삭제
+    {"dropped": [파티션 이름], "deleted": 삭제한 행 수} 반환
+    """
+    cutoff = add_months(current_month(now), -retention_months)
+    report = {"dropped": [], "deleted": 0}
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            for name, start in list_partitions():
+                if add_months(start, 1) <= cutoff:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                    report["dropped"].append(name)
+            while True:
+                cursor.execute(
+                    f'DELETE FROM "{DEFAULT}" WHERE ctid IN (SELECT ctid FROM'
+                    f' "{DEFAULT}" WHERE created_at < %s LIMIT %s)',
+                    [cutoff, DELETE_BATCH_SIZE],
+                )
+                if not cursor.rowcount:
+                    return report
+                report["deleted"] += cursor.rowcount
+
+    expired = LoginLog.objects.filter(created_at__lt=cutoff)
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            return report
+        report["deleted"] += LoginLog.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,235 @@
+"""프로필 페이지 섹션 로더
+
+프로필 상세 페이지의 섹션(프로필, 북마크, 관리 커뮤니티, 게시글, 참여 공구, 방명록)을
+고정된 쿼리 수로 가져오고 섹션별로 캐시한다. 섹션 캐시 키에는 버전 값이 들어가고,
+해당 섹션을 바꾸는 write 가 signal 로 버전을 바꿔서 무효화한다.
+"""
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from BFFs.pagination import KeysetPagination
+from community.models import Community, CommunityAdmin
+from community.serializers import CommunityCreateSerializer, MyCommunitySerializer
+from feed.models import Feed, GroupPurchase, JoinedUser
+from feed.serializers import ProfileFeedSerializer, ProfileGrouppurchaseSerializer
+from .models import GuestBook, Profile
+from .serializers import GuestBookSerializer, UserProfileSerializer
+
+SECTION_TIMEOUT = 60 * 5
+VERSION_KEY = "profile:{}:{}:version"
+SECTION_KEY = "profile:{}:{}:{}:{}"
+
+
+class ProfileFeedPagination(KeysetPagination):
+    page_size = 10
+    cursor_query_param = "feed_cursor"
+    page_size_query_param = "feed_page_size"
+
+
+class ProfileGuestBookPagination(KeysetPagination):
+    page_size = 10
+    cursor_query_param = "guestbook_cursor"
+    page_size_query_param = "guestbook_page_size"
+
+
+def get_version(user_id, section):
+    key = VERSION_KEY.format(user_id, section)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def invalidate_profile(user_id, *sections):
+    """user_id 프로필의 sections 캐시 무효화"""
+    cache.set_many(
+        {VERSION_KEY.format(user_id, section): uuid4().hex for section in sections},
+        None,
+    )
+
+
+class ProfileLoader:
+    """
+    ProfileDetailView 응답 조립, 섹션별로 캐시에 없을 때만 쿼리
+    """
+
+    def __init__(self, profile, request):
+        self.profile = profile
+        self.user_id = profile.user_id
+        self.request = request
+
+    def cached(self, section, load, *params):
+        """섹션 캐시 조회, params 는 페이지네이션처럼 같은 섹션 안의 구분값"""
+        key = SECTION_KEY.format(
+            self.user_id,
+            section,
+            get_version(self.user_id, section),
+            ":".join(str(param) for param in params),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = load()
+            cache.set(key, data, SECTION_TIMEOUT)
+        return data
+
+    def load(self):
+        return {
+            "profile": self.cached("profile", self.load_profile),
+            "bookmark": self.with_is_bookmarked(
+                self.cached("bookmark", self.load_bookmark)
+            ),
+            "community": self.cached("community", self.load_community),
+            "feed": self.paginated("feed", ProfileFeedPagination, self.load_feed),
+            "joined_grouppurchase": self.cached(
+                "joined_grouppurchase", self.load_joined_grouppurchase
+            ),
+            "guestbook": self.paginated(
+                "guestbook", ProfileGuestBookPagination, self.load_guestbook
+            ),
+        }
+
+    def paginated(self, section, pagination_class, load):
+        """
+        페이지 섹션, 캐시에는 목록과 cursor 값만 두고
+        링크는 요청 URL 의 다른 query 가 섞이지 않도록 요청마다 만든다
+        """
+        paginator = pagination_class()
+        paginator.request = self.request
+        params = self.request.query_params
+        page = self.cached(
+            section,
+            lambda: load(paginator),
+            params.get(paginator.cursor_query_param, ""),
+            params.get(paginator.page_size_query_param, ""),
+        )
+        return {
+            "next": paginator.get_cursor_link(page["next_cursor"]),
+            "previous": paginator.get_cursor_link(page["previous_cursor"]),
+            "first": paginator.get_first_link(),
+            "total_pages": page["total_pages"],
+            "results": page["results"],
+        }
+
+    def get_page(self, paginator, results):
+        return {
+            "next_cursor": paginator.get_next_cursor(),
+            "previous_cursor": paginator.get_previous_cursor(),
+            "total_pages": paginator.get_total_pages(),
+            "results": results,
+        }
+
+    def with_is_bookmarked(self, bookmarks):
+        """캐시된 북마크 목록에 요청한 유저의 북마크 여부 채우기"""
+        user = self.request.user
+        bookmarked_ids = set()
+        if user.is_authenticated and bookmarks:
+            bookmarked_ids = set(
+                user.bookmark.filter(
+                    id__in=[community["id"] for community in bookmarks]
+                ).values_list("id", flat=True)
+            )
+        return [
+            {**community, "is_bookmarked": community["id"] in bookmarked_ids}
+            for community in bookmarks
+        ]
+
+    # 섹션별 쿼리
+
+    def load_profile(self):
+        profile = (
+            Profile.objects.select_related("user")
+            .annotate(guestbook_count=Count("comment_set"))
+            .get(id=self.profile.id)
+        )
+        return UserProfileSerializer(profile).data
+
+    def load_bookmark(self):
+        bookmark = Community.objects.filter(bookmarked__id=self.user_id)
+        # is_bookmarked 는 요청한 유저마다 다르므로 with_is_bookmarked 에서 채운다
+        return CommunityCreateSerializer(bookmark, many=True).data
+
+    def load_community(self):
+        community = CommunityAdmin.objects.filter(user_id=self.user_id).select_related(
+            "community"
+        )
+        return MyCommunitySerializer(community, many=True).data
+
+    def load_feed(self, paginator):
+        feed = (
+            Feed.objects.filter(user_id=self.user_id)
+            .select_related("user__profile")
+            .prefetch_related("likes")
+        )
+        page = paginator.paginate_queryset(feed, self.request)
+        return self.get_page(paginator, ProfileFeedSerializer(page, many=True).data)
+
+    def load_joined_grouppurchase(self):
+        joined = (
+            GroupPurchase.objects.filter(
+                grouppurchase__user_id=self.user_id,
+                grouppurchase__is_deleted=False,
+            )
+            .select_related("community")
+            .distinct()
+            .order_by("-created_at")
+        )
+        return ProfileGrouppurchaseSerializer(joined, many=True).data
+
+    def load_guestbook(self, paginator):
+        guestbook = GuestBook.objects.filter(profile_id=self.profile.id).select_related(
+            "user__profile"
+        )
+        page = paginator.paginate_queryset(guestbook, self.request)
+        return self.get_page(paginator, GuestBookSerializer(page, many=True).data)
+
+
+# 섹션 무효화
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_profile_section(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id, "profile")
+
+
+@receiver([post_save, post_delete], sender=GuestBook)
+def invalidate_guestbook_section(sender, instance, **kwargs):
+    user_id = (
+        Profile.objects.filter(id=instance.profile_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    if user_id:
+        # profile 섹션의 bookmark_count 가 방명록 수
+        invalidate_profile(user_id, "profile", "guestbook")
+
+
+@receiver(m2m_changed, sender=Community.bookmarked.through)
+def invalidate_bookmark_section(sender, instance, action, pk_set, reverse, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        invalidate_profile(instance.id, "bookmark")
+    else:
+        for user_id in pk_set or ():
+            invalidate_profile(user_id, "bookmark")
+
+
+@receiver([post_save, post_delete], sender=CommunityAdmin)
+def invalidate_community_section(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id, "community")
+
+
+@receiver([post_save, post_delete], sender=Feed)
+def invalidate_feed_section(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id, "feed")
+
+
+@receiver([post_save, post_delete], sender=JoinedUser)
+def invalidate_joined_section(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id, "joined_grouppurchase")
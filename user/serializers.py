@@ -72,6 +72,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return obj.user
 
     def get_bookmark_count(self, obj):
+        if hasattr(obj, "guestbook_count"):
+            return obj.guestbook_count
         return obj.comment_set.count()
 
 
@@ -1,36 +1,73 @@
 from celery import shared_task
-from decouple import config
+from django.conf import settings
 from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
-from django.core.mail import send_mail
+from django.utils import timezone
 
+from .dormancy import run_dormancy
+from .loginlog import flush_login_logs, rollup_login_logs
+from .mail import MAX_RETRIES, MailNotSent, render, retry_unsent, send
+from .partitions import ensure_partitions, prune_login_logs
 
-@shared_task
-def verifymail(email, code):
+
+@shared_task(bind=True, max_retries=MAX_RETRIES)
+def verifymail(self, email, code):
     subject = "BFFs 이메일 인증코드 메일입니다."
-    from_email = config("EMAIL")
+    from_email = settings.DEFAULT_FROM_EMAIL
 
-    html_content = render_to_string("verfication.html", {"code": code})
+    html_content = render("verfication.html", {"code": code})
     send_email = EmailMessage(subject, html_content, from_email, [email])
     send_email.content_subtype = "html"
-    send_email.send()
+    try:
+        send([send_email])
+    except MailNotSent as error:
+        retry_unsent(self, error, (email, code))
 
 
-@shared_task
-def pwresetMail(email, reset_url):
-    send_mail(
+@shared_task(bind=True, max_retries=MAX_RETRIES)
+def pwresetMail(self, email, reset_url):
+    send_email = EmailMessage(
         subject="BFFs 비밀번호 변경 메일",
-        message=f"비밀번호 변경을 위해 해당링크를 클릭해주세요: {reset_url}",
+        body=f"비밀번호 변경을 위해 해당링크를 클릭해주세요: {reset_url}",
         from_email="sender@example.com",
-        recipient_list=[email],
+        to=[email],
     )
+    try:
+        send([send_email])
+    except MailNotSent as error:
+        retry_unsent(self, error, (email, reset_url))
+
+
+@shared_task(bind=True, max_retries=MAX_RETRIES)
+def information_email(self, subject, message, recipient_list):
+    """수신자마다 따로 보내서 다른 수신자 주소가 보이지 않게, 보내지 못한 수신자만 retry"""
+    from_email = settings.DEFAULT_FROM_EMAIL
+    messages = [
+        EmailMessage(subject, message, from_email, [email]) for email in recipient_list
+    ]
+    try:
+        send(messages)
+    except MailNotSent as error:
+        retry_unsent(self, error, (subject, message, recipient_list[error.sent :]))
 
 
 @shared_task
-def information_email(subject, message, *recipient_list):
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=config("EMAIL"),
-        recipient_list=[*recipient_list],
-    )
+def dormancy_job():
+    run_dormancy(information_email.delay)
+
+
+@shared_task
+def flush_login_logs_job():
+    flush_login_logs()
+
+
+@shared_task
+def login_log_maintenance_job():
+    """
+    어제(버퍼 flush 가 늦은 경우를 위해 그제까지) 로그인 기록 집계,
+    다음 달 파티션 미리 생성, 보관 기간 지난 기록 삭제
+    """
+    today = timezone.localdate()
+    for days in (2, 1):
+        rollup_login_logs(today - timezone.timedelta(days=days))
+    ensure_partitions()
+    prune_login_logs()
@@ -1,11 +1,40 @@
 from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+from unittest import mock, skipUnless
+from celery.exceptions import Retry
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 
-from .models import User, Profile, GuestBook, Verify
+from . import dormancy, mail as mailer
+from .loginlog import flush_login_logs, get_store, rollup_login_logs
+from .models import (
+    User,
+    Profile,
+    GuestBook,
+    Verify,
+    LoginLog,
+    UserLoginDaily,
+    IpLoginDaily,
+)
+from .partitions import (
+    add_months,
+    current_month,
+    ensure_partitions,
+    partition_login_log,
+    partition_name,
+    prune_login_logs,
+)
+from .ratelimit import LoginRateLimiter
+from .tasks import information_email, verifymail
+from community.models import Community
+from feed.models import Category, Feed
 
 
 class UserProfileViewTest(APITestCase):
@@ -73,6 +102,66 @@ class UserProfileViewTest(APITestCase):
         self.assertEqual(response.status_code, 204)
 
     # 비밀번호가 다를 때 회원탈퇴 실패
+    def test_profile_detail_sections(self):
+        """프로필 상세 섹션 쿼리 수는 게시글 수와 무관, 두 번째 조회는 캐시"""
+        cache.clear()
+        community = Community.objects.create(
+            title="title1", communityurl="title1", introduction="introduction1"
+        )
+        category = Category.objects.create(
+            community=community, category_name="얘기해요", category_url="talk"
+        )
+        community.bookmarked.add(self.user)
+        url = reverse("profile_detail_view", kwargs={"user_id": self.user.id})
+        Feed.objects.create(user=self.user, category=category, title="title")
+        with CaptureQueriesContext(connection) as one_feed:
+            self.client.get(url)
+
+        for i in range(5):
+            Feed.objects.create(user=self.user, category=category, title=f"title{i}")
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_feeds:
+            response = self.client.get(url)
+        self.assertEqual(len(one_feed), len(many_feeds))
+        self.assertEqual(len(response.data["feed"]["results"]), 6)
+        self.assertEqual(len(response.data["bookmark"]), 1)
+
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(url)
+        self.assertLess(len(cached), len(many_feeds))
+
+    def test_profile_detail_invalidate(self):
+        """방명록 작성시 프로필 캐시 갱신"""
+        cache.clear()
+        url = reverse("profile_detail_view", kwargs={"user_id": self.user.id})
+        self.client.get(url)
+        GuestBook.objects.create(
+            user=self.user, comment="comment", profile=self.user.profile
+        )
+        response = self.client.get(url)
+        self.assertEqual(len(response.data["guestbook"]["results"]), 1)
+        self.assertEqual(response.data["profile"]["bookmark_count"], 1)
+
+    def test_profile_detail_cached_links(self):
+        """캐시된 섹션의 페이지 링크는 요청마다 그 요청 URL 로 만든다"""
+        cache.clear()
+        community = Community.objects.create(
+            title="title1", communityurl="title1", introduction="introduction1"
+        )
+        category = Category.objects.create(
+            community=community, category_name="얘기해요", category_url="talk"
+        )
+        for i in range(2):
+            Feed.objects.create(user=self.user, category=category, title=f"title{i}")
+        url = reverse("profile_detail_view", kwargs={"user_id": self.user.id})
+        response = self.client.get(url, {"feed_page_size": 1, "token": "secret"})
+        self.assertIn("token=secret", response.data["feed"]["next"])
+
+        response = self.client.get(url, {"feed_page_size": 1})
+        self.assertNotIn("token", response.data["feed"]["next"])
+        self.assertIn("feed_cursor=", response.data["feed"]["next"])
+        self.assertNotIn("token", response.data["feed"]["first"])
+
     def test_user_delete_fail(self):
         user_id = self.user.id
         url = reverse("profile_detail_view", kwargs={"user_id": user_id})
@@ -122,6 +211,7 @@ class GuestBookTest(APITestCase):
             path=reverse("guestbook_view", kwargs={"profile_id": 1})
         )
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
 
 
     # guestbook comment create
@@ -312,11 +402,60 @@ class loginTest(APITestCase):
 
     def setUp(self):
         self.test_user = {"email": "test@test.com", "password": "test1234@"}
+        get_store().clear()
+        cache.clear()
 
     def test_login(self):
         response = self.client.post(self.path, self.test_user)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_login_single_write(self):
+        """로그인 성공시 user UPDATE 1번, 로그인 기록은 버퍼에서 bulk 저장"""
+        # Redis 저장소처럼 버퍼 사용
+        with mock.patch.object(get_store(), "shared", True), CaptureQueriesContext(
+            connection
+        ) as queries:
+            response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("UPDATE", "INSERT"))
+        ]
+        self.assertEqual(len(writes), 1)
+        self.assertIn("last_login", writes[0])
+        self.assertFalse(LoginLog.objects.exists())
+        self.assertEqual(flush_login_logs(), 1)
+        self.assertEqual(LoginLog.objects.get().user, self.user)
+
+    def test_login_without_shared_store(self):
+        """공유 저장소가 없으면 로그인 기록을 바로 저장"""
+        response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(LoginLog.objects.get().user, self.user)
+        self.assertEqual(flush_login_logs(), 0)
+
+    def test_login_dormant_after_password(self):
+        """휴면 안내는 비밀번호가 맞을 때만, 틀리면 상태를 알려주지 않고 기록도 안 바뀜"""
+        self.user.is_dormant = True
+        self.user.save()
+        response = self.client.post(
+            self.path, {"email": "test@test.com", "password": "wrong1234@"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("휴면", str(response.data))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 0)
+
+        response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("휴면", str(response.data))
+        response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_dormant)
+        self.assertEqual(self.user.login_count, 0)
+
     def test_login_none(self):
         test_user = {"email": "", "password": ""}
         response = self.client.post(self.path, test_user)
@@ -334,12 +473,45 @@ class loginTest(APITestCase):
 
     def test_login_password_notMatch_5times(self):
         test_user = {"email": "test@test.com", "password": "test1234@@"}
-        self.user.login_count = 6
-        self.user.save()
-        self.client.post(self.path, test_user)
+        for _ in range(LoginRateLimiter.email_limit):
+            self.client.post(self.path, test_user)
         response = self.client.post(self.path, self.user_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_login_locked_without_db(self):
+        """잠긴 이메일은 DB 조회 없이 거절, 실패해도 user row 는 바뀌지 않는다"""
+        test_user = {"email": "test@test.com", "password": "test1234@@"}
+        for _ in range(LoginRateLimiter.email_limit):
+            self.client.post(self.path, test_user)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.login_count, 0)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(queries), 0)
+
+    def test_login_ip_limit(self):
+        """없는 이메일 시도도 IP 별로 세서 한도를 넘으면 429"""
+        with mock.patch.object(LoginRateLimiter, "ip_limit", 3):
+            for i in range(3):
+                test_user = {"email": f"none{i}@test.com", "password": "test1234@"}
+                response = self.client.post(self.path, test_user)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.post(self.path, self.test_user)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_login_ip_limit_spoofed_forwarded_for(self):
+        """X-Forwarded-For 맨 앞을 바꿔도 프록시가 붙인 주소로 세서 429"""
+        with mock.patch.object(LoginRateLimiter, "ip_limit", 3):
+            for i in range(4):
+                test_user = {"email": f"none{i}@test.com", "password": "test1234@"}
+                response = self.client.post(
+                    self.path,
+                    test_user,
+                    HTTP_X_FORWARDED_FOR=f"10.0.0.{i}, 1.2.3.4, 172.16.0.1",
+                )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
     def test_login_user_notExist(self):
         test_user = {"email": "test3@test.com", "password": "test1234@"}
         response = self.client.post(self.path, test_user)
@@ -362,3 +534,241 @@ class loginTest(APITestCase):
         self.user.save()
         response = self.client.post(self.path, self.test_user)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class LoginLogRollupTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("roll@test.com", "roll", "test1234@")
+        cls.other = User.objects.create_user("up@test.com", "up", "test1234@")
+        cls.admin = User.objects.create_superuser(
+            "admin@test.com", "admin", "test1234@"
+        )
+        cls.day = timezone.localdate() - timedelta(days=1)
+        yesterday = timezone.now() - timedelta(days=1)
+        LoginLog.objects.bulk_create(
+            [
+                LoginLog(user=cls.user, ip_address="1.1.1.1", created_at=yesterday),
+                LoginLog(user=cls.user, ip_address="1.1.1.1", created_at=yesterday),
+                LoginLog(user=cls.user, ip_address="2.2.2.2", created_at=yesterday),
+                LoginLog(user=cls.other, ip_address="1.1.1.1", created_at=yesterday),
+                LoginLog(
+                    user=cls.other,
+                    ip_address="1.1.1.1",
+                    created_at=yesterday - timedelta(days=400),
+                ),
+            ]
+        )
+        cls.path = reverse("login_stats_view")
+
+    def test_rollup(self):
+        """유저별/IP별 하루 로그인 수, 다시 돌려도 같은 결과"""
+        rollup_login_logs(self.day)
+        self.assertEqual(rollup_login_logs(self.day), {"users": 2, "ips": 2})
+        self.assertEqual(
+            UserLoginDaily.objects.get(date=self.day, user=self.user).count, 3
+        )
+        self.assertEqual(
+            IpLoginDaily.objects.get(date=self.day, ip_address="1.1.1.1").count, 3
+        )
+
+    def test_prune(self):
+        """파티션이 없는 DB 는 보관 기간이 지난 기록만 batch 삭제"""
+        self.assertEqual(ensure_partitions(), [])
+        self.assertEqual(prune_login_logs(), {"dropped": [], "deleted": 1})
+        self.assertEqual(LoginLog.objects.count(), 4)
+
+    @skipUnless(connection.vendor == "postgresql", "login_log 파티션은 Postgres 전용")
+    def test_partition_default_rows(self):
+        """default 파티션에 쌓인 달은 파티션을 만들 때 옮기고, 지난 행은 prune 에서 삭제"""
+        # 테스트 transaction 안에서 남아 있는 deferred FK 검사를 먼저 끝내야 테이블을 바꿀 수 있다
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        partition_login_log()
+        ahead = add_months(current_month(), 4)
+        LoginLog.objects.create(user=self.user, ip_address="3.3.3.3", created_at=ahead)
+        LoginLog.objects.create(
+            user=self.user,
+            ip_address="4.4.4.4",
+            created_at=timezone.now() - timedelta(days=800),
+        )
+
+        self.assertEqual(
+            ensure_partitions(months_ahead=4),
+            [partition_name(add_months(current_month(), 3)), partition_name(ahead)],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT ip_address FROM "{partition_name(ahead)}"')
+            self.assertEqual(cursor.fetchall(), [("3.3.3.3",)])
+
+        report = prune_login_logs()
+        self.assertTrue(report["dropped"])
+        self.assertEqual(report["deleted"], 1)
+        self.assertEqual(LoginLog.objects.count(), 5)
+
+    def test_login_stats(self):
+        rollup_login_logs(self.day)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row["user"], row["count"]) for row in response.data["results"]],
+            [(self.user.id, 3), (self.other.id, 1)],
+        )
+
+        response = self.client.get(self.path, {"by": "ip", "ip": "1.1.1.1"})
+        self.assertEqual(response.data["results"], [{"date": self.day, "count": 3}])
+
+        response = self.client.get(self.path, {"start": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_stats_admin_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@mock.patch.multiple(
+    dormancy, BATCH_SIZE=2, EMAIL_BATCH_SIZE=2, DELETE_BATCH_SIZE=2, DELETE_PAUSE=0
+)
+class DormancyTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = {}
+        for name, count, fields in (
+            ("dormant", 3, {"last_login": now - timedelta(days=400)}),
+            ("notice", 3, {"last_login": now - timedelta(days=330, hours=12)}),
+            ("purge", 3, {"withdraw_at": now - timedelta(days=1900)}),
+            ("active", 1, {"last_login": now}),
+        ):
+            cls.users[name] = []
+            for i in range(count):
+                user = User.objects.create_user(f"{name}{i}@test.com", name)
+                User.objects.filter(id=user.id).update(**fields)
+                cls.users[name].append(user.id)
+
+    def setUp(self):
+        cache.clear()
+        self.notices = []
+
+    def send_notice(self, subject, message, recipient_list):
+        self.notices.append(recipient_list)
+
+    def test_run_dormancy(self):
+        """batch 로 나눠 휴면 전환, 휴면 예정 안내, 탈퇴 회원 삭제"""
+        report = dormancy.run_dormancy(self.send_notice)
+        self.assertEqual(report["dormant"]["users"], 3)
+        self.assertEqual(report["dormant"]["batches"], 2)
+        self.assertEqual(
+            set(User.objects.filter(is_dormant=True).values_list("id", flat=True)),
+            set(self.users["dormant"]),
+        )
+        self.assertEqual([len(emails) for emails in self.notices], [2, 1])
+        self.assertEqual(
+            sorted(sum(self.notices, [])),
+            [f"notice{i}@test.com" for i in range(3)],
+        )
+        self.assertFalse(User.objects.filter(id__in=self.users["purge"]).exists())
+        self.assertTrue(User.objects.filter(id__in=self.users["active"]).exists())
+
+    def test_run_dormancy_resume(self):
+        """같은 날 다시 돌리면 checkpoint 이후부터, 끝난 단계는 건너뜀"""
+        today = timezone.localdate()
+        cache.set(dormancy.CHECKPOINT_KEY.format(today, "dormant"), dormancy.DONE)
+        cache.set(
+            dormancy.CHECKPOINT_KEY.format(today, "notice"), self.users["notice"][1]
+        )
+        report = dormancy.run_dormancy(self.send_notice)
+        self.assertEqual(report["dormant"]["batches"], 0)
+        self.assertFalse(User.objects.filter(is_dormant=True).exists())
+        self.assertEqual(self.notices, [["notice2@test.com"]])
+
+        self.notices = []
+        report = dormancy.run_dormancy(self.send_notice)
+        self.assertEqual(self.notices, [])
+        self.assertEqual(report["purge"]["users"], 0)
+
+    def test_run_dormancy_crash_after_notice(self):
+        """안내를 보낸 batch 는 바로 checkpoint 를 남겨서, 그 뒤에 멈춰도 다시 보내지 않음"""
+
+        def crash(message, *args):
+            if args[0] == "notice":
+                raise RuntimeError
+
+        with mock.patch.object(dormancy.logger, "info", side_effect=crash):
+            with self.assertRaises(RuntimeError):
+                dormancy.run_dormancy(self.send_notice)
+        dormancy.run_dormancy(self.send_notice)
+        self.assertEqual(
+            sorted(sum(self.notices, [])),
+            [f"notice{i}@test.com" for i in range(3)],
+        )
+
+    def test_information_email(self):
+        """수신자마다 따로 보내서 다른 수신자가 보이지 않음"""
+        information_email("subject", "message", ["a@test.com", "b@test.com"])
+        self.assertEqual(
+            [message.to for message in mail.outbox], [["a@test.com"], ["b@test.com"]]
+        )
+
+
+class MailDispatchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        mailer.pool.close()
+        self.addCleanup(mailer.pool.close)
+
+    def test_verifymail(self):
+        """템플릿은 한 번만 compile, 연결은 task 끼리 재사용"""
+        mailer.get_template.cache_clear()
+        verifymail("a@test.com", "123456")
+        connection = mailer.pool.connection
+        verifymail("b@test.com", "654321")
+        self.assertIs(mailer.pool.connection, connection)
+        self.assertEqual(mailer.get_template.cache_info().misses, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[1].content_subtype, "html")
+        self.assertIn("654321", mail.outbox[1].body)
+
+    @mock.patch.object(mailer, "BATCH_SIZE", 2)
+    @mock.patch.object(information_email, "apply_async")
+    # 분 window 가 바뀌면 한도가 풀리므로 window 시작 시각으로 고정
+    @mock.patch.object(mailer.time, "time", return_value=60 * 28333334)
+    def test_information_email_rate_limit(self, time, apply_async):
+        """분당 한도를 넘으면 보내지 못한 수신자만 다음 window 에 다시"""
+        recipients = [f"user{i}@test.com" for i in range(5)]
+        with self.settings(EMAIL_RATE_PER_MINUTE=4):
+            information_email("subject", "message", recipients)
+        self.assertEqual(len(mail.outbox), 4)
+        args = apply_async.call_args.kwargs["args"]
+        self.assertEqual(args, ("subject", "message", recipients[4:]))
+        self.assertEqual(apply_async.call_args.kwargs["countdown"], 60)
+
+    @mock.patch.object(mailer, "BATCH_SIZE", 3)
+    @mock.patch.object(information_email, "retry", side_effect=Retry)
+    def test_information_email_error_mid_batch(self, retry):
+        """batch 중간에 연결이 끊기면 이미 보낸 수신자는 빼고 retry"""
+        recipients = ["a@test.com", "b@test.com", "c@test.com"]
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [1, SMTPServerDisconnected]
+        with mock.patch.object(
+            mailer.MailConnectionPool, "get", return_value=connection
+        ), self.assertRaises(Retry):
+            information_email("subject", "message", recipients)
+        self.assertEqual(connection.send_messages.call_count, 2)
+        self.assertEqual(retry.call_args.kwargs["args"][2], recipients[1:])
+
+    @mock.patch.object(information_email, "retry", side_effect=Retry)
+    def test_information_email_connection_error(self, retry):
+        """연결이 끊기면 연결을 닫고, 보내지 못한 수신자만 backoff 후 retry"""
+        recipients = ["a@test.com", "b@test.com"]
+        with mock.patch.object(
+            mailer.MailConnectionPool,
+            "get",
+            side_effect=SMTPServerDisconnected,
+        ), self.assertRaises(Retry):
+            information_email("subject", "message", recipients)
+        self.assertIsNone(mailer.pool.connection)
+        self.assertEqual(retry.call_args.kwargs["args"][2], recipients)
+        self.assertEqual(retry.call_args.kwargs["countdown"], mailer.RETRY_BACKOFF)
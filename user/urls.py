@@ -20,6 +20,7 @@ from .views import (
     GoogleLoginView,
     GoogleCallbackView,
     SearchUserView,
+    LoginStatsView,
 )
 
 urlpatterns = [
@@ -63,4 +64,5 @@ urlpatterns = [
     path("google/login/", GoogleLoginView.as_view(), name="google_login"),
     path("google/callback/", GoogleCallbackView.as_view(), name="google_callback"),
     path("search", SearchUserView.as_view(), name="search_user_view"),
+    path("admin/login-stats/", LoginStatsView.as_view(), name="login_stats_view"),
 ]
@@ -5,8 +5,11 @@ from django.contrib.auth.views import (
     PasswordResetConfirmView,
     PasswordResetCompleteView,
 )
+from django.db.models import Sum
 from django.shortcuts import redirect
+from django.utils import timezone
 from django.utils.crypto import get_random_string
+from django.utils.dateparse import parse_date
 from rest_framework.generics import ListAPIView, get_object_or_404
 from django.urls import reverse
 from django.utils.http import urlsafe_base64_encode
@@ -19,7 +22,9 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenViewBase
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from .models import User, Profile, GuestBook, Verify
+from BFFs.pagination import KeysetPagination
+from BFFs.sampling import RandomSamplePagination
+from .models import User, Profile, GuestBook, Verify, UserLoginDaily, IpLoginDaily
 from .serializers import (
     UserCreateSerializer,
     UserDelSerializer,
@@ -29,15 +34,11 @@ from .serializers import (
     GuestBookCreateSerializer,
     SearchUserSerializer,
 )
-from feed.serializers import ProfileFeedSerializer, ProfileGrouppurchaseSerializer
 from community.models import CommunityAdmin
-from community.serializers import (
-    CommunityCreateSerializer,
-    MyCommunitySerializer,
-    MyCommunityInfoSerializer,
-)
+from community.serializers import MyCommunityInfoSerializer
 from .validators import email_validator
 from .jwt_tokenserializer import CustomTokenObtainPairSerializer
+from .profile_loader import ProfileLoader
 from .tasks import verifymail, pwresetMail
 
 
@@ -286,10 +287,13 @@ class ProfileView(APIView):
 
     permission_classes = [permissions.AllowAny]
 
+    pagination_class = RandomSamplePagination
+
     def get(self, request):
-        profile = Profile.objects.all().order_by("?")
+        paginator = self.pagination_class()
+        profile = paginator.paginate_queryset(Profile.objects.all(), request)
         profile_serializer = UserProfileSerializer(profile, many=True)
-        return Response(profile_serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(profile_serializer.data)
 
 
 class ProfileDetailView(APIView):
@@ -298,43 +302,9 @@ class ProfileDetailView(APIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get(self, request, user_id):
-        profile = Profile.objects.get(user_id=user_id)
-        profile_serializer = UserProfileSerializer(profile)
-        user = User.objects.get(id=user_id)
-        bookmark = user.bookmark.all()
-        bookmark_serializer = CommunityCreateSerializer(
-            bookmark, context={"request": request}, many=True
-        )
-        community = CommunityAdmin.objects.filter(user_id=user_id)
-        community_serializer = MyCommunitySerializer(community, many=True)
-        feed = user.author.all()
-        feed_serializer = ProfileFeedSerializer(feed, many=True)
-        joined = (
-            user.joined_user.filter(user_id=user_id)
-            .exclude(is_deleted=True)
-            .prefetch_related("grouppurchase")
-            .all()
-        )
-        joined_grouppurchase = sorted(
-            [j.grouppurchase for j in joined], key=lambda x: x.created_at, reverse=True
-        )
-        joined_grouppurchase_serializer = ProfileGrouppurchaseSerializer(
-            joined_grouppurchase, many=True
-        )
-        guestbook = GuestBook.objects.filter(profile_id=profile.id).order_by(
-            "-created_at"
-        )
-        guestbook_serializer = GuestBookSerializer(guestbook, many=True)
+        profile = get_object_or_404(Profile, user_id=user_id)
         return Response(
-            {
-                "profile": profile_serializer.data,
-                "bookmark": bookmark_serializer.data,
-                "community": community_serializer.data,
-                "feed": feed_serializer.data,
-                "joined_grouppurchase": joined_grouppurchase_serializer.data,
-                "guestbook": guestbook_serializer.data,
-            },
-            status=status.HTTP_200_OK,
+            ProfileLoader(profile, request).load(), status=status.HTTP_200_OK
         )
 
     def patch(self, request, user_id):
@@ -394,16 +364,22 @@ class ProfileMyCommunityView(APIView):
         )
 
 
+class GuestBookPagination(KeysetPagination):
+    page_size = 10
+
+
 class GuestBookView(APIView):
     """방명록 CR view"""
 
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = GuestBookPagination
 
     def get(self, request, profile_id):
         profile = Profile.objects.get(id=profile_id)
-        comments = profile.comment_set.all()
+        paginator = self.pagination_class()
+        comments = paginator.paginate_queryset(profile.comment_set.all(), request)
         serializer = GuestBookSerializer(comments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request, profile_id):
         serializer = GuestBookCreateSerializer(data=request.data)
@@ -486,3 +462,70 @@ class SearchUserView(ListAPIView):
             mycomu__is_subadmin=True, mycomu__community__communityurl=communityurl
         )
         return queryset
+
+
+class LoginStatsView(APIView):
+    """
+    관리자용 로그인 통계, 원본 login_log 대신 일별 집계 테이블만 읽는다
+    by=user|ip, start/end=YYYY-MM-DD (기본 최근 30일)
+    user(유저 id) 나 ip 를 주면 그 대상의 일별 로그인 수, 없으면 기간 합계 상위 limit 개
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    # by: (집계 모델, 대상 필드, 대상 query param)
+    dimensions = {
+        "user": (UserLoginDaily, "user", "user"),
+        "ip": (IpLoginDaily, "ip_address", "ip"),
+    }
+    default_days = 30
+    default_limit = 50
+    max_limit = 500
+    invalid_message = "조회 조건이 올바르지 않습니다"
+
+    def parse_date(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+
+    def invalid(self):
+        return Response(
+            {"error": self.invalid_message}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    def get(self, request):
+        by = request.query_params.get("by", "user")
+        if by not in self.dimensions:
+            return self.invalid()
+        model, key, param = self.dimensions[by]
+        target = request.query_params.get(param)
+        try:
+            end = self.parse_date("end", timezone.localdate())
+            start = self.parse_date(
+                "start", end - timezone.timedelta(days=self.default_days - 1)
+            )
+            limit = int(request.query_params.get("limit", self.default_limit))
+            if target and by == "user":
+                target = int(target)
+        except ValueError:
+            return self.invalid()
+        if start > end or limit < 1:
+            return self.invalid()
+
+        rows = model.objects.filter(date__range=(start, end))
+        if target:
+            results = rows.filter(**{key: target}).order_by("date")
+            results = results.values("date", "count")
+        else:
+            results = (
+                rows.values(key)
+                .annotate(count=Sum("count"))
+                .order_by("-count", key)[: min(limit, self.max_limit)]
+            )
+        return Response(
+            {"by": by, "start": start, "end": end, "results": list(results)},
+            status=status.HTTP_200_OK,
+        )